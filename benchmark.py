@@ -0,0 +1,623 @@
+"""
+Бенчмарк установки шаблонов: локальный HTTP-сервер + сгенерированные архивы.
+
+    python benchmark.py                         # все сценарии, 5 прогонов
+    python benchmark.py --runs 10 --scale 0.2   # быстрее и меньше
+    python benchmark.py --set stream_extract=false --compare bench-old.json
+    python benchmark.py --startup               # проверка холодного старта (код 1 — регрессия)
+    python benchmark.py --resume --seed 7       # докачка через обрывы связи (код 1 — ошибка)
+
+Для каждого сценария меряются холодная установка (пустой кэш и хранилище
+шаблонов), теплая (архив уже в кэше, сервер отвечает 304) и
+get_installed_projects. Результаты сохраняются в JSON, чтобы сравнивать прогоны.
+eel подменяется заглушкой: окно не открывается, gevent не нужен.
+
+--startup меряет путь до первого экрана: импорт main.py и get_startup_state в
+новом процессе. Проверка падает, если при старте импортируется тяжелый модуль
+из LAZY_MODULES или время выходит за бюджет.
+
+--resume проверяет докачку: сервер понимает Range/If-Range и рвет ответ на
+случайном байте (ГСЧ с --seed, прогон воспроизводим). Каждая установка должна
+пройти, а sha256 архива в кэше — совпасть с исходным.
+"""
+import argparse
+import hashlib
+import http.server
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import types
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# --- СЦЕНАРИИ (SCENARIOS) ---
+# files — сколько файлов, file_size — размер каждого, compressible — текст или
+# случайные байты, content_length=False — сервер отдает chunked без размера.
+SCENARIOS = {
+    "huge_assets": {"files": 4, "file_size": 48 * 1024 * 1024, "compressible": False},
+    "huge_assets_chunked": {"files": 4, "file_size": 48 * 1024 * 1024, "compressible": False,
+                            "content_length": False},
+    "tiny_scripts": {"files": 5000, "file_size": 2 * 1024, "compressible": True},
+    "tiny_scripts_chunked": {"files": 5000, "file_size": 2 * 1024, "compressible": True,
+                             "content_length": False},
+}
+
+STAGES = ("queued", "connect", "download", "extract", "provision", "cleanup")
+
+# Модули, которые main.py должен импортировать только при первом использовании
+LAZY_MODULES = ("requests", "tkinter", "zipfile", "subprocess")
+DEFAULT_STARTUP_BUDGET_MS = 300
+
+
+def _install_eel_stub():
+    """Подменяет eel до импорта main: expose ничего не регистрирует, sleep — обычный."""
+    eel = types.ModuleType("eel")
+
+    def expose(name_or_function=None):
+        if callable(name_or_function):
+            return name_or_function
+        return lambda function: function
+
+    eel.expose = expose
+    eel.sleep = time.sleep
+    eel.spawn = lambda fn, *args, **kwargs: threading.Thread(
+        target=fn, args=args, kwargs=kwargs, daemon=True).start()
+    eel.init = eel.start = lambda *args, **kwargs: None
+    eel.__getattr__ = lambda name: (lambda *args, **kwargs: None)  # eel.<функция JS>(...)
+    sys.modules["eel"] = eel
+
+
+def make_archive(path, files, file_size, compressible, root="template-main/"):
+    """Архив как у GitHub: все внутри одной корневой папки."""
+    import zipfile  # Не на уровне модуля: --startup-child проверяет, что main.py его не тянет
+
+    text_line = b"// generated benchmark line: int value = 42;\n"
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(root, "")
+        for i in range(files):
+            folder = "Assets/Scripts" if compressible else "Assets/Art"
+            with z.open(f"{root}{folder}/{i // 500:03d}/file{i}.bin", "w") as f:
+                left = file_size
+                while left > 0:
+                    size = min(left, 1024 * 1024)
+                    if compressible:
+                        f.write((text_line * (size // len(text_line) + 1))[:size])
+                    else:
+                        f.write(os.urandom(size))
+                    left -= size
+    return path
+
+
+# --- HTTP-СЕРВЕР (LOCAL STAND-IN FOR GITHUB) ---
+# /<имя>.zip — с Content-Length, /<имя>.zip?chunked — без него.
+# ETag = sha1 файла, на If-None-Match отвечаем 304, как GitHub.
+
+class _ArchiveHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        name, _, query = self.path.lstrip("/").partition("?")
+        archive = self.server.archives.get(name)
+        if archive is None:
+            self.send_error(404)
+            return
+
+        etag = f'"{archive["etag"]}"'
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        chunked = query == "chunked"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("ETag", etag)
+        if chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Content-Length", str(archive["size"]))
+        self.end_headers()
+
+        with open(archive["path"], "rb") as f:
+            for block in iter(lambda: f.read(256 * 1024), b""):
+                if chunked:
+                    self.wfile.write(f"{len(block):x}\r\n".encode() + block + b"\r\n")
+                else:
+                    self.wfile.write(block)
+            if chunked:
+                self.wfile.write(b"0\r\n\r\n")
+
+
+class _FlakyArchiveHandler(_ArchiveHandler):
+    """
+    Для --resume: отдает хвост архива по Range, если If-Range совпал с ETag,
+    и с вероятностью server.drop_rate обрывает соединение на случайном байте.
+    """
+
+    def do_GET(self):
+        name = self.path.lstrip("/").partition("?")[0]
+        archive = self.server.archives.get(name)
+        if archive is None:
+            self.send_error(404)
+            return
+
+        etag, size = f'"{archive["etag"]}"', archive["size"]
+        start = 0
+        requested = self.headers.get("Range", "")
+        if requested.startswith("bytes=") and self.headers.get("If-Range") == etag:
+            start = int(requested[len("bytes="):].partition("-")[0])
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.resumed += start > 0
+            drop = start < size and self.server.random.random() < self.server.drop_rate
+            cut = self.server.random.randint(start, size - 1) if drop else size
+            self.server.drops += drop
+
+        if start >= size:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{size}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if start:
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/zip")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(size - start))
+        self.end_headers()
+
+        with open(archive["path"], "rb") as f:
+            f.seek(start)
+            left = cut - start
+            while left > 0:
+                block = f.read(min(left, 256 * 1024))
+                self.wfile.write(block)
+                left -= len(block)
+        if cut < size:
+            self.wfile.flush()
+            self.close_connection = True
+            self.connection.shutdown(2)  # socket.SHUT_RDWR: клиент видит обрыв посреди тела
+
+
+def start_server(archives, handler=_ArchiveHandler):
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    server.archives = archives
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- ИЗМЕРЕНИЯ (MEASUREMENTS) ---
+
+def _current_rss():
+    """Текущий RSS в байтах (psutil, если есть; иначе /proc; иначе None)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PeakRss:
+    """Пиковый RSS за время блока with (опрос каждые 10 мс)."""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            rss = _current_rss()
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        if self.peak is None:
+            # Нет ни psutil, ни /proc: только максимум за весь процесс (POSIX)
+            import resource
+            scale = 1 if sys.platform == "darwin" else 1024
+            self.peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def summarize(values):
+    values = sorted(v for v in values if v is not None)
+    if not values:
+        return None
+    main = sys.modules["main"]
+    return {"p50": main._percentile(values, 0.5), "p95": main._percentile(values, 0.95),
+            "min": values[0], "max": values[-1], "n": len(values)}
+
+
+def _reset_app_state(main):
+    """Холодный старт: без кэша архивов, хранилища шаблонов и индекса установленных."""
+    for name in ("cache", "templates", "manifests"):
+        shutil.rmtree(os.path.join(main._get_app_data_dir(), name), ignore_errors=True)
+    with main._cache_lock:
+        main._cache_index = None
+    with main._installed_lock:
+        main._installed_index = None
+        if os.path.exists(main._installed_index_path()):
+            os.remove(main._installed_index_path())
+
+
+def run_install(main, course_id, project_name, student, archive):
+    """Одна установка через download_project. Возвращает метрики прогона."""
+    with PeakRss() as rss:
+        started = time.perf_counter()
+        result = main.download_project(course_id, project_name, student)
+        wall = time.perf_counter() - started
+    if result.get("status") != "success":
+        raise RuntimeError(f"{project_name}: {result.get('msg')}")
+    # download_project опрашивает задачу раз в 0.1 с, поэтому время берем из самой задачи
+    elapsed = max(result["elapsed"], 1e-6)
+
+    timings = result.get("timings") or {}
+    download_time = timings.get("download")
+    return {
+        "elapsed": round(elapsed, 4),
+        "wall": round(wall, 4),
+        "mode": result.get("mode"),
+        "mb_per_sec": round(archive["size"] / 1048576 / elapsed, 2),
+        "download_mb_per_sec": (round(archive["size"] / 1048576 / download_time, 2)
+                                if download_time else None),
+        "files_per_sec": round(archive["files"] / elapsed, 1),
+        "peak_rss_mb": round(rss.peak / 1048576, 1) if rss.peak else None,
+        "stages": {stage: timings.get(stage) for stage in STAGES},
+    }
+
+
+def run_listing(main, course_id):
+    """get_installed_projects: первый вызов строит индекс, второй берет его из памяти."""
+    with main._installed_lock:
+        main._installed_index = None
+        if os.path.exists(main._installed_index_path()):
+            os.remove(main._installed_index_path())
+    timings = {}
+    for phase in ("cold", "warm"):
+        started = time.perf_counter()
+        projects = main.get_installed_projects(course_id)
+        timings[phase] = round(time.perf_counter() - started, 4)
+    timings["projects"] = len(projects)
+    return timings
+
+
+def run_scenario(main, name, archive, url, runs):
+    course_id = f"bench_{name}"
+    _write_catalog(main, course_id, name, url)
+
+    cold, warm, listing = [], [], []
+    for i in range(runs):
+        _reset_app_state(main)
+        cold.append(run_install(main, course_id, name, f"cold{i:03d}", archive))
+        # Теплая установка: архив в кэше, шаблон в хранилище — только провижининг
+        warm.append(run_install(main, course_id, name, f"warm{i:03d}", archive))
+        listing.append(run_listing(main, course_id))
+        print(f"  run {i + 1}/{runs}: cold {cold[-1]['elapsed']}s ({cold[-1]['mode']}, "
+              f"{cold[-1]['mb_per_sec']} MB/s, {cold[-1]['files_per_sec']} files/s), "
+              f"warm {warm[-1]['elapsed']}s, listing {listing[-1]['cold']}s")
+
+    def aggregate(samples):
+        return {
+            "elapsed": summarize(s["elapsed"] for s in samples),
+            "mb_per_sec": summarize(s["mb_per_sec"] for s in samples),
+            "download_mb_per_sec": summarize(s["download_mb_per_sec"] for s in samples),
+            "files_per_sec": summarize(s["files_per_sec"] for s in samples),
+            "peak_rss_mb": summarize(s["peak_rss_mb"] for s in samples),
+            "stages": {stage: summarize(s["stages"][stage] for s in samples) for stage in STAGES},
+            "modes": sorted({s["mode"] for s in samples}),
+        }
+
+    return {
+        "archive": {key: archive[key] for key in ("size", "files", "content_length")},
+        "cold": aggregate(cold),
+        "warm": aggregate(warm),
+        "listing": {phase: summarize(item[phase] for item in listing) for phase in ("cold", "warm")},
+        "runs": {"cold": cold, "warm": warm, "listing": listing},
+    }
+
+
+def _write_catalog(main, course_id, project_name, url):
+    """data.json с одним курсом; mtime сдвигаем, чтобы каталог точно перечитался."""
+    with open(main.DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump([{"id": course_id, "title": course_id, "editor": "vscode",
+                    "projects": [{"name": project_name, "github_url": url}]}], f)
+    st = os.stat(main.DATA_FILE)
+    os.utime(main.DATA_FILE, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def _parse_setting(text):
+    key, _, value = text.partition("=")
+    try:
+        return key, json.loads(value)
+    except ValueError:
+        return key, value
+
+
+def _git_revision():
+    import subprocess
+
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def print_report(results, previous=None):
+    print("\n📊 scenario               cold p50/p95 s   MB/s p50   files/s p50   "
+          "peak RSS MB   warm p50 s   listing p50 s")
+    for name, data in results["scenarios"].items():
+        cold, warm = data["cold"], data["warm"]
+        line = (f"   {name:<22} {cold['elapsed']['p50']:>6.3f}/{cold['elapsed']['p95']:<6.3f}"
+                f"   {cold['mb_per_sec']['p50']:>8.1f}   {cold['files_per_sec']['p50']:>11.1f}"
+                f"   {cold['peak_rss_mb']['max'] if cold['peak_rss_mb'] else 0:>11.1f}"
+                f"   {warm['elapsed']['p50']:>10.3f}   {data['listing']['cold']['p50']:>13.4f}")
+        old = (previous or {}).get("scenarios", {}).get(name)
+        if old:
+            change = cold["elapsed"]["p50"] / old["cold"]["elapsed"]["p50"] - 1
+            line += f"   ({change:+.0%} vs previous)"
+        print(line)
+        stages = ", ".join(f"{stage} {cold['stages'][stage]['p50']:.3f}/{cold['stages'][stage]['p95']:.3f}"
+                           for stage in STAGES if cold["stages"][stage])
+        print(f"     stages p50/p95 s: {stages}")
+
+
+# --- ХОЛОДНЫЙ СТАРТ (STARTUP) ---
+
+def startup_child():
+    """Запускается в отдельном процессе: импорт main.py и первый вызов окна."""
+    _install_eel_stub()
+    before = set(sys.modules)
+    started = time.perf_counter()
+    sys.path.insert(0, ROOT)
+    import main
+    imported = time.perf_counter()
+    state = main.get_startup_state()
+    finished = time.perf_counter()
+    print(json.dumps({
+        "import_ms": round((imported - started) * 1000, 2),
+        "state_ms": round((finished - imported) * 1000, 2),
+        "courses": len(state["courses"]),
+        "eager_modules": [name for name in LAZY_MODULES if name in sys.modules and name not in before],
+    }))
+    return 0
+
+
+def run_startup_check(runs, budget_ms):
+    """Несколько холодных стартов подряд; 0 — все в порядке, 1 — регрессия."""
+    import subprocess
+
+    work = tempfile.mkdtemp(prefix="digiscool-startup-")
+    try:
+        for name in ("data.json", "config.json"):
+            if os.path.exists(os.path.join(ROOT, name)):
+                shutil.copy(os.path.join(ROOT, name), work)
+        env = dict(os.environ, HOME=os.path.join(work, "home"), USERPROFILE=os.path.join(work, "home"))
+
+        samples = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), "--startup-child"],
+                                    cwd=work, env=env, capture_output=True, text=True, check=True).stdout
+            samples.append(json.loads(output.strip().splitlines()[-1]))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    total = sorted(sample["import_ms"] + sample["state_ms"] for sample in samples)
+    eager = sorted({name for sample in samples for name in sample["eager_modules"]})
+    p50 = total[len(total) // 2]
+    print(f"🚀 startup: import p50 {sorted(s['import_ms'] for s in samples)[len(samples) // 2]} ms, "
+          f"get_startup_state p50 {sorted(s['state_ms'] for s in samples)[len(samples) // 2]} ms, "
+          f"total p50 {p50:.1f} ms (budget {budget_ms} ms)")
+
+    failed = False
+    if eager:
+        print(f"❌ imported at startup, must be lazy: {', '.join(eager)}")
+        failed = True
+    if p50 > budget_ms:
+        print(f"❌ startup is over budget: {p50:.1f} ms > {budget_ms} ms")
+        failed = True
+    if not failed:
+        print("✅ startup OK")
+    return 1 if failed else 0
+
+
+# --- ДОКАЧКА (RESUME) ---
+
+def run_resume_check(main, work, runs, seed, drop_rate, scale):
+    """Установки через сервер, который рвет связь; 0 — все прошло, 1 — ошибка."""
+    files = max(1, int(200 * scale))
+    path = make_archive(os.path.join(work, "resume.zip"), files, 32 * 1024, compressible=False)
+    with open(path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    archive = {"path": path, "size": os.path.getsize(path), "files": files, "etag": digest[:40]}
+
+    server = start_server({"resume.zip": archive}, _FlakyArchiveHandler)
+    server.lock = threading.Lock()
+    server.random = random.Random(seed)
+    server.drop_rate = drop_rate
+    server.requests = server.resumed = server.drops = 0
+    url = f"http://127.0.0.1:{server.server_address[1]}/resume.zip"
+    course_id = "bench_resume"
+    with open(main.DATA_FILE, "w", encoding="utf-8") as f:
+        json.dump([{"id": course_id, "title": course_id, "editor": "vscode",
+                    "projects": [{"name": "resume", "github_url": url, "sha256": digest}]}], f)
+    print(f"🔌 resume: {files} files, {archive['size'] / 1048576:.1f} MB, "
+          f"drop rate {drop_rate}, seed {seed}")
+
+    failures = []
+    try:
+        for i in range(runs):
+            _reset_app_state(main)
+            student = f"resume{i:03d}"
+            result = main.download_project(course_id, "resume", student)
+            if result.get("status") != "success":
+                failures.append(f"run {i + 1}: install failed: {result.get('msg')}")
+                continue
+            entry = main._cache_get(url)
+            if entry is None:
+                failures.append(f"run {i + 1}: archive is not in the cache")
+                continue
+            with open(entry["path"], "rb") as f:
+                cached = hashlib.sha256(f.read()).hexdigest()
+            if cached != digest:
+                failures.append(f"run {i + 1}: cached archive sha256 {cached} != {digest}")
+            installed = sum(len(names) for _, _, names in
+                            os.walk(os.path.join(main._get_course_path(course_id), student, "resume")))
+            if installed < files:
+                failures.append(f"run {i + 1}: {installed} of {files} files installed")
+            print(f"  run {i + 1}/{runs}: {result.get('status')} ({result.get('mode')}), "
+                  f"requests so far {server.requests}, drops {server.drops}, resumed {server.resumed}")
+    finally:
+        server.shutdown()
+
+    if drop_rate > 0 and not server.resumed:
+        failures.append("no request was resumed with Range: the check did not exercise resume")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print(f"✅ resume OK: {runs} installs, {server.drops} drops, {server.resumed} resumed requests")
+    return 1 if failures else 0
+
+
+def main_cli(argv=None):
+    parser = argparse.ArgumentParser(description="DigisCool install benchmark")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="run only this scenario (can repeat)")
+    parser.add_argument("--runs", type=int, default=5, help="runs per scenario (default 5)")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply file count and asset size (e.g. 0.1 for a quick run)")
+    parser.add_argument("--set", action="append", default=[], metavar="KEY=VALUE",
+                        help="config.json setting for the run, e.g. stream_extract=false")
+    parser.add_argument("--output", default=None, help="JSON file for results")
+    parser.add_argument("--compare", default=None, help="previous results JSON to compare with")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary work folder")
+    parser.add_argument("--startup", action="store_true",
+                        help="check cold start (lazy imports, get_startup_state time) instead")
+    parser.add_argument("--startup-budget-ms", type=float, default=DEFAULT_STARTUP_BUDGET_MS,
+                        help=f"max p50 startup time for --startup (default {DEFAULT_STARTUP_BUDGET_MS})")
+    parser.add_argument("--startup-child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--resume", action="store_true",
+                        help="check download resume through a server that drops connections instead")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for --resume (default 1)")
+    parser.add_argument("--drop-rate", type=float, default=0.7,
+                        help="share of responses --resume cuts short (default 0.7)")
+    args = parser.parse_args(argv)
+
+    if args.startup_child:
+        return startup_child()
+    if args.startup:
+        return run_startup_check(args.runs, args.startup_budget_ms)
+
+    work = tempfile.mkdtemp(prefix="digiscool-bench-")
+    output = os.path.abspath(args.output or f"bench-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    previous = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+
+    # Все служебные папки main.py (~/.digiscool, config.json, data.json) — во временной папке
+    os.environ["HOME"] = os.environ["USERPROFILE"] = os.path.join(work, "home")
+    os.chdir(work)
+    settings = dict(_parse_setting(item) for item in args.set)
+    settings["download_path"] = os.path.join(work, "students")
+    if args.resume:
+        # Обрывов много: обрыв внутри чанка (64 КБ) прогресса не дает, поэтому
+        # попыток без прогресса нужно больше, а паузы между ними — короче
+        settings.setdefault("download_attempts", 20)
+        settings.setdefault("http_backoff", 0.01)
+    with open("config.json", "w", encoding="utf-8") as f:
+        json.dump(settings, f)
+
+    _install_eel_stub()
+    sys.path.insert(0, ROOT)
+    import main
+
+    try:
+        if args.resume:
+            return run_resume_check(main, work, args.runs, args.seed, args.drop_rate, args.scale)
+        print(f"🏗️ Generating archives in {work}")
+        archives = {}
+        names = args.scenario or list(SCENARIOS)
+        for name in names:
+            shape = SCENARIOS[name]
+            # --scale уменьшает число мелких файлов или размер крупных
+            files, file_size = shape["files"], shape["file_size"]
+            if files > 100:
+                files = max(1, int(files * args.scale))
+            else:
+                file_size = max(1, int(file_size * args.scale))
+            path = make_archive(os.path.join(work, f"{name}.zip"), files, file_size, shape["compressible"])
+            etag = hashlib.sha1()
+            with open(path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    etag.update(block)
+            etag = etag.hexdigest()
+            archives[f"{name}.zip"] = {"path": path, "size": os.path.getsize(path), "files": files,
+                                       "etag": etag, "content_length": shape.get("content_length", True)}
+
+        server = start_server(archives)
+        port = server.server_address[1]
+        results = {
+            "meta": {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "revision": _git_revision(),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "runs": args.runs,
+                "scale": args.scale,
+                "settings": settings,
+            },
+            "scenarios": {},
+        }
+        for name in names:
+            archive = archives[f"{name}.zip"]
+            url = f"http://127.0.0.1:{port}/{name}.zip" + ("" if archive["content_length"] else "?chunked")
+            print(f"\n▶️ {name}: {archive['files']} files, {archive['size'] / 1048576:.1f} MB"
+                  f"{'' if archive['content_length'] else ', no Content-Length'}")
+            results["scenarios"][name] = run_scenario(main, name, archive, url, args.runs)
+        server.shutdown()
+
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print_report(results, previous)
+        print(f"\n💾 Results saved to {output}")
+        return 0
+    finally:
+        os.chdir(ROOT)
+        if args.keep:
+            print(f"📂 Work folder kept: {work}")
+        else:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main_cli())
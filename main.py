@@ -1,54 +1,93 @@
+import argparse
+import bisect
+import contextlib
+import csv
 import eel
+import hashlib
 import json
 import os
 import re
-import requests
-import zipfile
+import shutil
 import io
-import subprocess
+import logging
+import logging.handlers
+import random
+import struct
 import sys
-import tkinter as tk
-from tkinter import filedialog
+import tempfile
+import threading
+import time
+import uuid
+import zlib
+import queue
+import collections
+import urllib.parse
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+
+# requests, zipfile, subprocess и tkinter импортируются внутри функций, при первом
+# использовании: окно открывается быстрее (requests один стоит ~0.1 с).
+
+_STARTED_AT = time.perf_counter()  # Для замера startup.python (до открытия окна)
 
 
 CONFIG_FILE = 'config.json'
 
+# --- СОБЫТИЯ ДЛЯ UI ---
+# ВАЖНО: eel можно вызывать только из gevent-цикла, поэтому рабочие потоки
+# не трогают eel напрямую, а кладут в _ui_events пары (имя JS-функции, данные).
+# Их отправляет во Frontend _ui_pump.
+
+_ui_events = queue.Queue()
+
+
+def _ui_pump():
+    """
+    Живет в gevent-цикле eel: забирает события из рабочих потоков
+    и отправляет их во Frontend.
+    """
+    while True:
+        while True:
+            try:
+                js_function, payload = _ui_events.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                getattr(eel, js_function)(payload)
+            except Exception as e:
+                print(f"UI event error ({js_function}): {e}")
+
+        # Прогресс задач: по одному событию на задачу с ее последним состоянием
+        for job in _take_dirty_jobs():
+            try:
+                eel.update_job_progress(job)
+            except Exception as e:
+                print(f"UI event error (update_job_progress): {e}")
+        eel.sleep(0.05)
+
 
 def _check_java_17():
     """
     Проверяет наличие Java 17 (желательно Adoptium/Temurin).
     Возвращает: {"installed": bool, "version": str, "details": str}
     """
-    try:
-        # 1. Пробуем штатную команду java -version
-        # startuinfo скрывает окно консоли
-        startupinfo = subprocess.STARTUPINFO()
-        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-
-        result = subprocess.run(
-            ["java", "-version"],
-            capture_output=True, text=True, startupinfo=startupinfo
-        )
-        output = result.stderr + result.stdout  # Java пишет версию в stderr
+    # 1. Пробуем штатную команду java -version (окно консоли скрыто)
+    output = _get_cmd_output(["java", "-version"])  # Java пишет версию в stderr
+    if output is None:
+        return {"installed": False, "version": "Missing", "tooltip": "Java not in PATH"}
 
-        # Ищем версию 17.x.x
-        version_match = re.search(r'version "17\.\d+\.\d+', output)
-        is_17 = bool(version_match)
+    # Ищем версию 17.x.x
+    version_match = re.search(r'version "17\.\d+\.\d+', output)
+    is_17 = bool(version_match)
 
-        # Проверяем, это Adoptium/Temurin или нет (не критично, но полезно знать)
-        is_adoptium = "Temurin" in output or "Adoptium" in output
+    version_str = "Unknown"
+    if version_match:
+        version_str = version_match.group(0).replace('version "', '')
 
-        version_str = "Unknown"
-        if version_match:
-            version_str = version_match.group(0).replace('version "', '')
-
-        return {
-            "installed": is_17,
-            "version": version_str if is_17 else f"Wrong Ver ({version_str})",
-            "tooltip": output.split('\n')[0]
-        }
-    except FileNotFoundError:
-        return {"installed": False, "version": "Missing", "tooltip": "Java not in PATH"}
+    return {
+        "installed": is_17,
+        "version": version_str if is_17 else f"Wrong Ver ({version_str})",
+        "tooltip": output.split('\n')[0]
+    }
 
 
 def _check_program_path(possible_paths, name_for_display):
@@ -67,65 +106,605 @@ def _check_program_path(possible_paths, name_for_display):
     return {"installed": False, "version": "Missing", "tooltip": f"{name_for_display} not found"}
 
 
-@eel.expose
-def check_software_versions():
-    print("🔎 Checking specific course software...")
-
-    report = {}
-
-    # 1. JDK 17 (Checking Command Line)
-    report["java"] = _check_java_17()
-
-    # 2. Visual Studio Code (Checking Paths)
-    vscode_paths = [
+# Программы, которые ищем по путям: ключ -> (пути, имя для отображения)
+SOFTWARE_PATHS = {
+    # Visual Studio Code
+    "vscode": ([
         r"%LOCALAPPDATA%\Programs\Microsoft VS Code\Code.exe",
         r"C:\Program Files\Microsoft VS Code\Code.exe"
-    ]
-    report["vscode"] = _check_program_path(vscode_paths, "VS Code")
-
-    # 3. Unity Hub (Checking Paths)
-    unity_hub_paths = [
+    ], "VS Code"),
+    # Unity Hub
+    "unity": ([
         r"C:\Program Files\Unity Hub\Unity Hub.exe",
         r"C:\Program Files (x86)\Unity Hub\Unity Hub.exe"
-    ]
-    report["unity"] = _check_program_path(unity_hub_paths, "Unity Hub")
-
-    # 4. Visual Studio (Community 2022/2019) - для Unity
-    # Проверяем наличие devenv.exe
-    vs_paths = [
+    ], "Unity Hub"),
+    # Visual Studio (Community 2022/2019) - для Unity, проверяем наличие devenv.exe
+    "visualstudio": ([
         r"C:\Program Files\Microsoft Visual Studio\2022\Community\Common7\IDE\devenv.exe",
         r"C:\Program Files (x86)\Microsoft Visual Studio\2019\Community\Common7\IDE\devenv.exe"
-    ]
-    report["visualstudio"] = _check_program_path(vs_paths, "Visual Studio")
-
-    # 5. Minecraft Education
+    ], "Visual Studio"),
+    # Minecraft Education
     # (Сложно проверить Store-версию, проверяем десктопную или папку данных)
-    mc_edu_paths = [
+    "mcedu": ([
         r"C:\Program Files (x86)\Minecraft Education Edition\minecraft.windows.exe",
         r"%LOCALAPPDATA%\Packages\Microsoft.MinecraftEducationEdition_8wekyb3d8bbwe"  # Папка Store версии
-    ]
-    report["mcedu"] = _check_program_path(mc_edu_paths, "MC Education")
+    ], "MC Education"),
+}
+
+# --- МЕТРИКИ (METRICS) ---
+# Замер ("span") — имя этапа и его длительность. Последние METRICS_WINDOW
+# замеров по каждому имени держим в памяти для get_metrics (панель диагностики),
+# а каждый замер пишем строкой JSON в ~/.digiscool/logs/metrics.jsonl (с ротацией).
+# По ним видно, где теряется время: в сети (connect, transfer) или на диске
+# (folder_create, extract, provision, cleanup).
+
+METRICS_WINDOW = 500
+METRICS_LOG_MAX_BYTES = 1024 * 1024
+METRICS_LOG_BACKUPS = 3
+HISTOGRAM_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)  # секунды
+
+_metrics = {}  # имя span -> deque[(секунды, ok, байт)]
+_metrics_lock = threading.Lock()
+_metrics_logger = None
+
+
+def _get_metrics_logger():
+    global _metrics_logger
+    with _metrics_lock:
+        if _metrics_logger is None:
+            folder = os.path.join(_get_app_data_dir(), "logs")
+            os.makedirs(folder, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                os.path.join(folder, "metrics.jsonl"), maxBytes=METRICS_LOG_MAX_BYTES,
+                backupCount=METRICS_LOG_BACKUPS, encoding='utf-8')
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger = logging.getLogger("digiscool.metrics")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _metrics_logger = logger
+        return _metrics_logger
+
+
+def _record_span(name, seconds, ok=True, **fields):
+    """Запоминает замер и пишет его в лог (поле bytes дает скорость в МБ/с)."""
+    with _metrics_lock:
+        samples = _metrics.setdefault(name, collections.deque(maxlen=METRICS_WINDOW))
+        samples.append((seconds, ok, fields.get("bytes")))
+
+    record = {"ts": round(time.time(), 3), "span": name, "seconds": round(seconds, 4), "ok": ok}
+    record.update(fields)
+    try:
+        _get_metrics_logger().info(json.dumps(record, ensure_ascii=False, default=str))
+    except OSError as e:
+        print(f"Metrics log error: {e}")
+
+
+@contextlib.contextmanager
+def _span(name, **fields):
+    """
+    Замеряет блок with. Поля можно дописать внутри блока:
+        with _span("transfer", job_id=job_id) as span:
+            span["bytes"] = ...
+    """
+    started = time.perf_counter()
+    ok = True
+    try:
+        yield fields
+    except BaseException as e:
+        ok = False
+        fields["error"] = type(e).__name__
+        raise
+    finally:
+        _record_span(name, time.perf_counter() - started, ok, **fields)
+
+
+@eel.expose
+def get_metrics():
+    """Скользящие гистограммы по каждому этапу (последние METRICS_WINDOW замеров)."""
+    with _metrics_lock:
+        samples = {name: list(values) for name, values in _metrics.items()}
+
+    spans = {}
+    for name, values in sorted(samples.items()):
+        seconds = sorted(value[0] for value in values)
+        counts = [0] * (len(HISTOGRAM_BUCKETS) + 1)  # Последняя корзина — больше 60 с
+        for value in seconds:
+            counts[bisect.bisect_left(HISTOGRAM_BUCKETS, value)] += 1
+        rates = sorted(size / value / (1024 * 1024) for value, _, size in values if size and value > 0)
+        spans[name] = {
+            "count": len(values),
+            "errors": sum(1 for value in values if not value[1]),
+            "p50": round(_percentile(seconds, 0.5), 4),
+            "p95": round(_percentile(seconds, 0.95), 4),
+            "max": round(seconds[-1], 4),
+            "histogram": counts,
+            "mb_per_sec_p50": round(_percentile(rates, 0.5), 2) if rates else None,
+        }
+    return {"spans": spans, "buckets": list(HISTOGRAM_BUCKETS), "window": METRICS_WINDOW,
+            "cache": get_cache_stats(), "http": get_http_stats()}
+
+
+# --- ПРОВЕРКА ОКРУЖЕНИЯ: ПАРАЛЛЕЛЬНО + КЭШ ---
+# Все проверки запускаются одновременно, поэтому холодная проверка длится
+# столько, сколько самая медленная (java -version). Результат каждой проверки
+# кэшируется на probe_cache_ttl секунд и сбрасывается раньше, если изменился
+# "отпечаток" программы (путь к exe и его mtime).
+# Кэш сохраняется в ~/.digiscool/software_status.json: при следующем запуске
+# окно сразу показывает последний известный статус, а в пределах TTL
+# проверки (и запуск JVM) не повторяются.
+
+DEFAULT_PROBE_CACHE_TTL = 300
+
+_probe_cache = None  # ключ -> (отпечаток, время проверки, результат); читается с диска при первом обращении
+_probe_lock = threading.Lock()
+_probe_executor = None
+
+
+def _path_fingerprint(paths):
+    """Какие из путей существуют и их mtime — дешево, без запуска программ."""
+    fingerprint = []
+    for path in paths:
+        try:
+            fingerprint.append((path, os.stat(path).st_mtime_ns))
+        except OSError:
+            fingerprint.append((path, None))
+    return tuple(fingerprint)
+
+
+def _probe_fingerprint(key):
+    if key == "java":
+        return _path_fingerprint([shutil.which("java") or "java"])
+    paths, _ = SOFTWARE_PATHS[key]
+    return _path_fingerprint([os.path.expandvars(p) for p in paths])
+
+
+def _software_status_path():
+    return os.path.join(_get_app_data_dir(), "software_status.json")
+
+
+def _load_probe_cache_locked():
+    """Кэш проверок с прошлого запуска (вызывать под _probe_lock)."""
+    global _probe_cache
+    if _probe_cache is None:
+        _probe_cache = {}
+        try:
+            with open(_software_status_path(), 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+            for key, item in saved.items():
+                # В JSON отпечаток стал списком списков — возвращаем кортежи
+                fingerprint = tuple(tuple(part) for part in item["fingerprint"])
+                _probe_cache[key] = (fingerprint, item["checked"], item["result"])
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Software status file is broken, ignoring: {e}")
+    return _probe_cache
+
+
+def _save_probe_cache_locked():
+    path = _software_status_path()
+    data = {key: {"fingerprint": fingerprint, "checked": checked, "result": result}
+            for key, (fingerprint, checked, result) in _probe_cache.items()}
+    try:
+        _atomic_write_json(path, data, indent=4)
+    except OSError as e:
+        print(f"Cannot save software status: {e}")
+
+
+def _run_probe(key):
+    """Результат проверки: из кэша, если отпечаток тот же и TTL не истек."""
+    fingerprint = _probe_fingerprint(key)
+    ttl = _config_number("probe_cache_ttl", DEFAULT_PROBE_CACHE_TTL)
+    with _probe_lock:
+        cached = _load_probe_cache_locked().get(key)
+    if cached and cached[0] == fingerprint and time.time() - cached[1] < ttl:
+        return cached[2]
+
+    with _span(f"probe.{key}") as span:
+        if key == "java":
+            result = _check_java_17()
+        else:
+            result = _check_program_path(*SOFTWARE_PATHS[key])
+        span["installed"] = result.get("installed")
 
-    return report
+    with _probe_lock:
+        _load_probe_cache_locked()[key] = (fingerprint, time.time(), result)
+        _save_probe_cache_locked()
+    return result
 
 
-def _load_config():
-    """Читает конфиг. Если файла нет — возвращает дефолт."""
-    if os.path.exists(CONFIG_FILE):
+def _start_probes(on_result=None):
+    """Запускает все проверки в пуле. Возвращает {ключ: Future}."""
+    global _probe_executor
+    keys = ["java"] + list(SOFTWARE_PATHS)
+    with _probe_lock:
+        if _probe_executor is None:
+            _probe_executor = ThreadPoolExecutor(max_workers=len(keys), thread_name_prefix="probe")
+
+    futures = {}
+    for key in keys:
+        future = _probe_executor.submit(_run_probe, key)
+        if on_result:
+            future.add_done_callback(lambda f, key=key: on_result(key, f))
+        futures[key] = future
+    return futures
+
+
+def _probe_result(future):
+    try:
+        return future.result()
+    except Exception as e:
+        return {"installed": False, "version": "Error", "tooltip": str(e)}
+
+
+@eel.expose
+def check_software_versions():
+    """Полный отчет по всем программам (ждет все проверки, не блокируя окно)."""
+    return _run_blocking(_check_software_versions_sync)
+
+
+def _check_software_versions_sync():
+    print("🔎 Checking specific course software...")
+    with _span("probes"):
+        futures = _start_probes()
+        return {key: _probe_result(future) for key, future in futures.items()}
+
+
+@eel.expose
+def start_software_check():
+    """
+    Запускает проверки и сразу возвращается. Каждый результат приходит во
+    Frontend отдельно через update_software_status, как только готов.
+    """
+    print("🔎 Checking specific course software (streaming)...")
+
+    def on_result(key, future):
+        _ui_events.put(("update_software_status", dict(_probe_result(future), tool=key)))
+
+    _start_probes(on_result)
+    return {"status": "started"}
+
+
+# --- БЫСТРЫЙ СТАРТ (STARTUP) ---
+# Первый экран строится из одного вызова get_startup_state: каталог, настройки
+# и последний известный статус программ — без сети и без запуска программ.
+# Свежие проверки Frontend запускает уже после отрисовки (start_software_check).
+
+@eel.expose
+def get_startup_state():
+    """Всё для первого экрана одним вызовом. software — результаты прошлых проверок."""
+    with _span("startup.state"):
+        with _probe_lock:
+            software = {key: dict(result, checked=checked)
+                        for key, (_, checked, result) in _load_probe_cache_locked().items()}
+        return {
+            "courses": _catalog.courses(),
+            "catalog_error": _catalog.error,
+            "settings": get_current_settings(),
+            "software": software,
+        }
+
+
+@eel.expose
+def report_startup_timing(timings):
+    """Frontend сообщает, когда нарисовал первый экран (мс от открытия страницы)."""
+    _record_span("startup.first_paint", timings.get("first_paint_ms", 0) / 1000,
+                 state_ms=timings.get("state_ms"))
+    print(f"🚀 First paint in {timings.get('first_paint_ms', 0):.0f} ms")
+    return {"status": "success"}
+
+
+# --- ФОНОВЫЕ ЗАДАЧИ ДЛЯ EEL (TASKS) ---
+# eel работает на gevent без monkey-patching: любой блокирующий вызов (диск,
+# subprocess, сеть, диалог Tk) внутри exposed-функции замораживает всё окно.
+# Поэтому тяжелая работа идет в пуле потоков:
+#   - обычные exposed-функции ждут результат через _run_blocking (eel.sleep
+#     отпускает цикл, websocket продолжает работать);
+#   - start_task запускает функцию как задачу с ID: Frontend получает результат
+#     событием on_task_done и может отменить задачу через cancel_task.
+# Отмена — кооперативная: функция получает cancel (threading.Event) и сама
+# проверяет его между шагами.
+
+TASK_WORKERS = 4
+TASK_KEEP_SECONDS = 600  # Сколько хранить результаты завершенных задач
+
+_tasks = {}  # task_id -> {"name", "status", "result", "msg", "cancel", "future", "finished"}
+_tasks_lock = threading.Lock()
+_task_executor = None
+_dialog_executor = None
+
+
+class TaskCancelled(Exception):
+    """Задачу отменили через cancel_task."""
+
+
+def _get_task_executor():
+    global _task_executor
+    with _tasks_lock:
+        if _task_executor is None:
+            _task_executor = ThreadPoolExecutor(max_workers=TASK_WORKERS, thread_name_prefix="task")
+        return _task_executor
+
+
+def _get_dialog_executor():
+    """Отдельный поток для диалогов Tk: Tk не любит, когда его дергают из разных потоков."""
+    global _dialog_executor
+    with _tasks_lock:
+        if _dialog_executor is None:
+            _dialog_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dialog")
+        return _dialog_executor
+
+
+def _check_task_cancelled(cancel):
+    if cancel is not None and cancel.is_set():
+        raise TaskCancelled()
+
+
+def _run_blocking(fn, *args, executor=None, poll_interval=0.01):
+    """Выполняет fn в пуле и ждет результат, не блокируя gevent-цикл eel."""
+    future = (executor or _get_task_executor()).submit(fn, *args)
+    while not future.done():
+        eel.sleep(poll_interval)
+    return future.result()
+
+
+def _start_download_task(course_id, project_name, student_name):
+    """
+    Загрузка как задача без своего потока в пуле задач: возвращает (job_id, future),
+    future завершается колбэком задачи очереди загрузок. Отменяется через
+    cancel_download(job_id), а не future.cancel().
+    """
+    future = Future()
+    future.set_running_or_notify_cancel()
+    job_id = _submit_download(course_id, project_name, student_name)
+    if isinstance(job_id, dict):
+        future.set_result(job_id)
+        return None, future
+    with _jobs_lock:
+        job_future = _job_controls[job_id]["future"]
+
+    def on_job_done(f):
+        # Может выполниться под _jobs_lock (cancel_download), поэтому _jobs здесь не читаем
+        if f.cancelled():
+            future.set_exception(TaskCancelled())  # Сняли с очереди до старта
+            return
         try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            pass  # Если файл битый, игнорируем
-    return {"download_path": ""}
+            result = f.result()
+        except BaseException as e:
+            future.set_exception(e)
+            return
+        if result.get("status") == "cancelled":
+            future.set_exception(TaskCancelled())
+        else:
+            future.set_result(result)
+
+    job_future.add_done_callback(on_job_done)
+    return job_id, future
 
 
-def _save_config(key, value):
-    """Обновляет одно значение в конфиге и сохраняет файл."""
-    config = _load_config()
-    config[key] = value
-    with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=4)
+def _task_functions():
+    """Что можно запускать через start_task: имя -> (функция, принимает ли cancel)."""
+    return {
+        "check_software_versions": (_check_software_versions_sync, False),
+        "get_installed_projects": (_get_installed_projects_sync, True),
+        "get_installed_page": (_get_installed_page_sync, True),
+        "choose_folder": (_choose_folder_sync, False),
+        "download_project": (_start_download_task, False),  # Особый случай в start_task
+    }
+
+
+def _finish_task(task_id, future):
+    """Колбэк пула: записывает итог задачи и отправляет on_task_done во Frontend."""
+    with _tasks_lock:
+        task = _tasks.get(task_id)
+        if task is None:
+            return
+        try:
+            task["result"] = future.result()
+            task["status"] = "success"
+        except (TaskCancelled, CancelledError):
+            task["status"] = "cancelled"
+            task["msg"] = "Задача отменена"
+        except Exception as e:
+            print(f"Task {task['name']} failed: {e}")
+            task["status"] = "error"
+            task["msg"] = str(e)
+        task["finished"] = time.time()
+        event = _public_task(task_id, task)
+    _ui_events.put(("on_task_done", event))
+
+
+def _public_task(task_id, task):
+    return {"task_id": task_id, "name": task["name"], "status": task["status"],
+            "result": task["result"], "msg": task["msg"]}
+
+
+@eel.expose
+def start_task(name, args=None):
+    """
+    Запускает блокирующую функцию в фоне и сразу возвращает {"task_id"}.
+    Результат придет во Frontend через on_task_done(task).
+    """
+    functions = _task_functions()
+    if name not in functions:
+        return {"status": "error", "msg": f"Unknown task: {name}"}
+    fn, accepts_cancel = functions[name]
+    args = list(args or [])
+
+    task_id = uuid.uuid4().hex[:12]
+    cancel = threading.Event()
+    with _tasks_lock:
+        # Старые завершенные задачи больше никому не нужны
+        now = time.time()
+        for old_id in [t for t, task in _tasks.items()
+                       if task["finished"] and now - task["finished"] > TASK_KEEP_SECONDS]:
+            del _tasks[old_id]
+        _tasks[task_id] = {"name": name, "status": "running", "result": None, "msg": None,
+                           "cancel": cancel, "future": None, "finished": None, "job_id": None}
+
+    if fn is _start_download_task:
+        # Загрузку ведет очередь загрузок, поток пула задач на ожидание не тратим
+        job_id, future = fn(*args)
+        with _tasks_lock:
+            _tasks[task_id].update(future=future, job_id=job_id)
+        future.add_done_callback(lambda f: _finish_task(task_id, f))
+        return {"status": "started", "task_id": task_id}
+
+    executor = _get_dialog_executor() if name == "choose_folder" else _get_task_executor()
+    if accepts_cancel:
+        future = executor.submit(fn, *args, cancel=cancel)
+    else:
+        future = executor.submit(fn, *args)
+    with _tasks_lock:
+        _tasks[task_id]["future"] = future
+    future.add_done_callback(lambda f: _finish_task(task_id, f))
+    return {"status": "started", "task_id": task_id}
+
+
+@eel.expose
+def cancel_task(task_id):
+    """Просит задачу остановиться (если она еще не началась — снимает ее с очереди)."""
+    with _tasks_lock:
+        task = _tasks.get(task_id)
+        if not task:
+            return {"status": "error", "msg": "Unknown task"}
+        if task["status"] != "running":
+            return {"status": "error", "msg": f"Задача уже завершена ({task['status']})"}
+        task["cancel"].set()
+        future = task["future"]
+        job_id = task["job_id"]
+    if job_id is not None:
+        cancel_download(job_id)  # Задача завершится колбэком, когда остановится загрузка
+    elif future is not None:
+        future.cancel()
+    return {"status": "success"}
+
+
+@eel.expose
+def get_task(task_id):
+    """Состояние задачи (для Frontend, если событие on_task_done было пропущено)."""
+    with _tasks_lock:
+        task = _tasks.get(task_id)
+        return _public_task(task_id, task) if task else None
+
+
+# --- НАСТРОЙКИ (CONFIG.JSON) ---
+# Настройки живут в памяти: файл читается один раз при первом обращении,
+# а каждое изменение сразу записывается на диск атомарно (временный файл + rename),
+# поэтому при падении посреди записи config.json не окажется наполовину записанным.
+
+def _replace_file(tmp_path, path):
+    """os.replace с повторами: на Windows он падает, если файл кто-то держит открытым."""
+    for attempt in range(5):
+        try:
+            os.replace(tmp_path, path)
+            return
+        except PermissionError:
+            if attempt == 4:
+                raise
+            time.sleep(0.05)
+
+
+def _atomic_write_json(path, data, indent=None):
+    """
+    Атомарно записывает JSON: временный файл в той же папке, fsync и rename.
+    При падении посреди записи на диске остается старая версия файла.
+    """
+    folder = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}-", suffix=".tmp", dir=folder)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        _replace_file(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class SettingsStore:
+    """Настройки в памяти с атомарной записью и подпиской на изменения."""
+
+    def __init__(self, path, defaults):
+        self.path = path
+        self.defaults = dict(defaults)
+        self._lock = threading.RLock()
+        self._data = None
+        self._subscribers = []
+
+    def _ensure_loaded(self):
+        """Читает файл один раз. Вызывать под self._lock."""
+        if self._data is not None:
+            return
+        self._data = dict(self.defaults)
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                loaded = json.load(f)
+            if not isinstance(loaded, dict):
+                raise ValueError("config must be a JSON object")
+            self._data.update(loaded)
+        except (OSError, ValueError) as e:
+            # Битый файл не теряем молча: откладываем копию и работаем с дефолтом
+            backup = self.path + ".broken"
+            print(f"⚠️ {self.path} is broken ({e}), saved copy to {backup}")
+            try:
+                shutil.copyfile(self.path, backup)
+            except OSError:
+                pass
+
+    def get(self, key, default=None):
+        with self._lock:
+            self._ensure_loaded()
+            return self._data.get(key, default)
+
+    def snapshot(self):
+        """Копия всех настроек."""
+        with self._lock:
+            self._ensure_loaded()
+            return dict(self._data)
+
+    def update(self, **changes):
+        """Меняет настройки, пишет файл и оповещает подписчиков."""
+        with self._lock:
+            self._ensure_loaded()
+            changes = {k: v for k, v in changes.items() if self._data.get(k) != v}
+            if not changes:
+                return
+            self._data.update(changes)
+            self._write(self._data)
+            subscribers = list(self._subscribers)
+
+        for callback in subscribers:
+            try:
+                callback(changes)
+            except Exception as e:
+                print(f"Settings subscriber error: {e}")
+
+    def set(self, key, value):
+        self.update(**{key: value})
+
+    def subscribe(self, callback):
+        """callback(changes: dict) вызывается после каждого сохранения."""
+        with self._lock:
+            self._subscribers.append(callback)
+
+    def _write(self, data):
+        _atomic_write_json(self.path, data, indent=4)
+
+
+_settings = SettingsStore(CONFIG_FILE, defaults={"download_path": ""})
+
+
+def _config_number(key, default):
+    """Число из настроек; если там мусор — дефолт."""
+    try:
+        return float(_settings.get(key, default))
+    except (TypeError, ValueError):
+        return default
 
 
 def _get_default_download_path():
@@ -133,18 +712,17 @@ def _get_default_download_path():
     return os.path.join(os.path.expanduser("~"), "Documents", "DigisCool")
 
 
+def _get_base_path():
+    """Папка установки из настроек (или путь по умолчанию)."""
+    return _settings.get("download_path") or _get_default_download_path()
+
+
 # --- API EEL ---
 
 @eel.expose
 def get_current_settings():
     """Отдает Frontend текущую папку загрузки"""
-    config = _load_config()
-    current_path = config.get("download_path")
-
-    if not current_path:
-        current_path = _get_default_download_path()
-
-    return {"download_path": current_path}
+    return {"download_path": _get_base_path()}
 
 
 @eel.expose
@@ -152,7 +730,15 @@ def choose_folder():
     """
     Открывает нативное окно выбора папки через Tkinter.
     Возвращает выбранный путь или None, если отменили.
+    Диалог живет в отдельном потоке, окно лаунчера при этом не замирает.
     """
+    return _run_blocking(_choose_folder_sync, executor=_get_dialog_executor())
+
+
+def _choose_folder_sync():
+    import tkinter as tk
+    from tkinter import filedialog
+
     # Создаем скрытое окно Tkinter (оно нужно, чтобы запустить диалог)
     root = tk.Tk()
     root.withdraw()  # Скрываем главное окно
@@ -166,7 +752,7 @@ def choose_folder():
         # Нормализуем путь (меняем слэши для красоты)
         folder_selected = os.path.normpath(folder_selected)
         # Сохраняем сразу в конфиг
-        _save_config("download_path", folder_selected)
+        _settings.set("download_path", folder_selected)
         return folder_selected
 
     return None
@@ -177,6 +763,8 @@ def _get_cmd_output(command_list):
     Внутренняя функция: запускает команду скрытно и возвращает текст вывода.
     Работает и с stdout, и с stderr (так как Java пишет версию в stderr).
     """
+    import subprocess
+
     startupinfo = None
 
     # Специфика Windows: скрываем черное окно консоли
@@ -219,157 +807,2010 @@ def _extract_version(output_text):
     return "Unknown"
 
 
+# --- КАТАЛОГ КУРСОВ (DATA.JSON) ---
+# data.json читается один раз и держится в памяти с индексами по id курса
+# и по (курс, имя проекта). Файл перечитывается, только если изменились
+# его mtime или размер, поэтому обновление UI не парсит JSON заново.
+
+DATA_FILE = 'data.json'
+
+
+class CatalogError(Exception):
+    """data.json не прошел проверку структуры."""
+
+
+class CourseCatalog:
+    """Каталог курсов из data.json с O(1) поиском курса и проекта."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._signature = None  # (mtime_ns, size) последнего прочитанного файла
+        self._courses = []
+        self._by_id = {}
+        self._projects = {}  # (course_id, project_name) -> проект
+        self.error = None
+
+    def _refresh(self):
+        """Перечитывает файл, если он изменился. Вызывать под self._lock."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            if self.error != "File not found":
+                print("Error: File not found!")
+            self._signature = None
+            self._courses, self._by_id, self._projects = [], {}, {}
+            self.error = "File not found"
+            return
+
+        signature = (st.st_mtime_ns, st.st_size)
+        if signature == self._signature:
+            return
+        self._signature = signature
+
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+            by_id, projects = self._build_indexes(data)
+        except json.JSONDecodeError as e:
+            print(f"Error wrong JSON format: {e}")
+            self.error = str(e)
+            return  # Оставляем последнюю рабочую версию каталога
+        except CatalogError as e:
+            print(f"Error in {self.path}: {e}")
+            self.error = str(e)
+            return
+
+        self._courses, self._by_id, self._projects = data, by_id, projects
+        self.error = None
+        print(f"📚 Catalog loaded: {len(data)} courses, {len(projects)} templates")
+
+    @staticmethod
+    def _build_indexes(data):
+        """Проверяет структуру data.json и строит индексы."""
+        if not isinstance(data, list):
+            raise CatalogError("top level must be a list of courses")
+
+        by_id = {}
+        projects = {}
+        for i, course in enumerate(data):
+            if not isinstance(course, dict):
+                raise CatalogError(f"course #{i} is not an object")
+            course_id = course.get('id')
+            if not isinstance(course_id, str) or not course_id:
+                raise CatalogError(f"course #{i} has no 'id'")
+            if course_id in by_id:
+                raise CatalogError(f"duplicate course id '{course_id}'")
+            if not isinstance(course.get('title', ''), str):
+                raise CatalogError(f"course '{course_id}': 'title' must be a string")
+            if not isinstance(course.get('projects', []), list):
+                raise CatalogError(f"course '{course_id}': 'projects' must be a list")
+            by_id[course_id] = course
+
+            for proj in course.get('projects', []):
+                name = proj.get('name') if isinstance(proj, dict) else None
+                if not isinstance(name, str) or not name:
+                    raise CatalogError(f"course '{course_id}': project without 'name'")
+                url = proj.get('github_url')
+                if not isinstance(url, str) or not url.startswith(('http://', 'https://')):
+                    raise CatalogError(f"project '{name}': 'github_url' must be an http(s) URL")
+                # Необязательные sha256 / size — ими проверяется скачанный архив
+                sha256 = proj.get('sha256')
+                if sha256 is not None and not (isinstance(sha256, str)
+                                               and re.fullmatch(r'[0-9a-fA-F]{64}', sha256)):
+                    raise CatalogError(f"project '{name}': 'sha256' must be 64 hex characters")
+                size = proj.get('size')
+                if size is not None and (not isinstance(size, int) or isinstance(size, bool)
+                                         or size < 0):
+                    raise CatalogError(f"project '{name}': 'size' must be a non-negative integer")
+                if (course_id, name) in projects:
+                    raise CatalogError(f"course '{course_id}': duplicate project '{name}'")
+                projects[(course_id, name)] = proj
+
+        return by_id, projects
+
+    def courses(self):
+        with self._lock:
+            self._refresh()
+            return self._courses
+
+    def get_course(self, course_id):
+        with self._lock:
+            self._refresh()
+            return self._by_id.get(course_id)
+
+    def get_project(self, course_id, project_name):
+        with self._lock:
+            self._refresh()
+            return self._projects.get((course_id, project_name))
+
+
+_catalog = CourseCatalog(DATA_FILE)
+
+
 @eel.expose
-def download_project(course_id, project_name, student_name, project_index):
-    # 1. Загружаем конфиг и пути
-    config = _load_config()
-    base_path = config.get("download_path")
-    if not base_path:
-        base_path = _get_default_download_path()
+def get_courses():
+    """
+    Возвращает список курсов из каталога (data.json читается только при изменении).
+    """
+    return _catalog.courses()
+
+
+# --- ОЧЕРЕДЬ ЗАГРУЗОК (DOWNLOAD QUEUE) ---
+# Каждая загрузка — отдельная задача (job) со своим ID.
+# Задачи выполняются в пуле из N потоков, поэтому несколько шаблонов для разных
+# учеников качаются параллельно, а не по очереди.
+# Рабочие потоки не трогают eel напрямую — события идут через _ui_events.
+
+DEFAULT_MAX_PARALLEL_DOWNLOADS = 3
+
+_jobs = {}  # job_id -> публичное состояние задачи (то, что видит Frontend)
+_job_controls = {}  # job_id -> {"cancel": Event, "future": Future} (в JSON не отдаем)
+_jobs_lock = threading.Lock()
+_download_executor = None
+_download_workers = None  # Размер пула загрузок из командной строки (None — из конфига)
+_FINISHED_STATUSES = ("success", "error", "cancelled")
+JOB_KEEP_SECONDS = 600  # Сколько хранить завершенные задачи (как TASK_KEEP_SECONDS)
+
+# Прогресс: не чаще PROGRESS_INTERVAL секунд на задачу, промежуточные обновления сливаются
+PROGRESS_INTERVAL = 0.1
+_dirty_jobs = set()
+
+
+class DownloadCancelled(Exception):
+    """Задачу отменили через cancel_download."""
+
+
+class IncompleteDownload(Exception):
+    """Соединение закрылось раньше, чем пришел весь файл."""
+
 
-    print(f"📥 Downloading to: {base_path}")
+class IntegrityError(Exception):
+    """Архив не совпал с sha256 / size из data.json."""
+
+
+def _download_worker_count():
+    """Сколько загрузок идет параллельно: --workers или max_parallel_downloads."""
+    if _download_workers is not None:
+        return _download_workers
+    return max(1, int(_config_number("max_parallel_downloads", DEFAULT_MAX_PARALLEL_DOWNLOADS)))
+
+
+def _get_download_executor():
+    """Создает пул загрузок при первом обращении (размер берется из конфига)."""
+    global _download_executor
+    with _jobs_lock:
+        if _download_executor is None:
+            _download_executor = ThreadPoolExecutor(max_workers=_download_worker_count(),
+                                                    thread_name_prefix="download")
+        return _download_executor
+
+
+def _set_download_workers(workers):
+    """Меняет число параллельных загрузок; пул соединений HTTP пересоздается под него."""
+    global _download_executor, _download_workers, _http_session
+    with _jobs_lock:
+        _download_workers = workers
+        _download_executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="download")
+    with _http_lock:
+        _http_session = None  # Старая сессия доработает текущие загрузки
+
+
+def _emit_job_event(job_id):
+    """
+    Помечает задачу как изменившуюся. _ui_pump отправит только ее последнее
+    состояние, поэтому частые обновления сливаются в одно событие.
+    """
+    with _jobs_lock:
+        _dirty_jobs.add(job_id)
+
+
+def _take_dirty_jobs():
+    """Снимки всех изменившихся задач (для _ui_pump)."""
+    with _jobs_lock:
+        snapshots = [dict(_jobs[job_id]) for job_id in _dirty_jobs if job_id in _jobs]
+        _dirty_jobs.clear()
+    return snapshots
+
+
+class ProgressReporter:
+    """
+    Прогресс одной задачи: этап, байты, скорость и ETA.
+    Байтовые обновления публикуются не чаще PROGRESS_INTERVAL, смена этапа — сразу.
+    """
+
+    # Какую часть общей шкалы 0-100% занимает каждый этап
+    STAGE_PERCENT = {
+        "queued": (0, 0),
+        "connect": (0, 0),
+        "download": (0, 90),
+        "extract": (90, 95),
+        "provision": (95, 99),
+        "cleanup": (99, 99),
+        "done": (100, 100),
+    }
+
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.stage_name = "queued"
+        self.stage_started = time.perf_counter()
+        self.timings = {}  # этап -> секунды
+        self.last_emit = 0.0
+        self.last_sample = None  # (время, байты) для расчета скорости
+        self.speed = None
+
+    def _publish(self, **fields):
+        with _jobs_lock:
+            job = _jobs.get(self.job_id)
+            if not job:
+                return
+            job.update(fields)
+            job["timings"] = dict(self.timings)
+        self.last_emit = time.perf_counter()
+        _emit_job_event(self.job_id)
+
+    def stage(self, name, message):
+        """Переход на новый этап (connect, download, extract, cleanup, done)."""
+        now = time.perf_counter()
+        self.timings[self.stage_name] = round(
+            self.timings.get(self.stage_name, 0) + now - self.stage_started, 3)
+        self.stage_name = name
+        self.stage_started = now
+        self.last_sample = None
+        self.speed = None
+        self._publish(stage=name, message=message, percent=self.STAGE_PERCENT[name][0],
+                      speed=None, eta=None)
+
+    def bytes(self, done, total, force=False):
+        """Сколько байт скачано (total=None, если сервер не сказал размер)."""
+        now = time.perf_counter()
+        if not force and now - self.last_emit < PROGRESS_INTERVAL:
+            return
+
+        if self.last_sample and now > self.last_sample[0]:
+            current = (done - self.last_sample[1]) / (now - self.last_sample[0])
+            # Сглаживаем, чтобы ETA не прыгал
+            self.speed = current if self.speed is None else 0.3 * current + 0.7 * self.speed
+        self.last_sample = (now, done)
+
+        percent = None
+        eta = None
+        if total:
+            low, high = self.STAGE_PERCENT[self.stage_name]
+            percent = int(low + (high - low) * min(done, total) / total)
+            if self.speed:
+                eta = round((total - done) / self.speed, 1)
+        self._publish(bytes_done=done, bytes_total=total, percent=percent,
+                      speed=round(self.speed) if self.speed else None, eta=eta)
+
+    def items(self, done, total, force=False):
+        """Прогресс по файлам (распаковка)."""
+        now = time.perf_counter()
+        if not force and now - self.last_emit < PROGRESS_INTERVAL:
+            return
+        low, high = self.STAGE_PERCENT[self.stage_name]
+        percent = int(low + (high - low) * done / total) if total else low
+        self._publish(percent=percent, files_done=done, files_total=total)
+
+
+def _get_reporter(job_id):
+    control = _job_controls.get(job_id)
+    return control["progress"] if control else ProgressReporter(job_id)
+
+
+def _check_cancelled(job_id):
+    """Бросает DownloadCancelled, если задачу попросили отменить."""
+    control = _job_controls.get(job_id)
+    if control and control["cancel"].is_set():
+        raise DownloadCancelled()
+
+
+def _job_key(course_id, student_name, project_name):
+    """Ключ целевой папки: две задачи не должны писать в одну папку одновременно."""
+    return (
+        course_id,
+        sanitize_filename(student_name).lower(),
+        sanitize_filename(project_name).lower(),
+    )
+
+
+def _submit_download(course_id, project_name, student_name, kind="install"):
+    """
+    Создает задачу и ставит ее в очередь. Возвращает job_id или dict с ошибкой.
+    kind: "install" (скачать и установить) или "update" (обновить установленный проект).
+    """
+    key = _job_key(course_id, student_name, project_name)
+    with _jobs_lock:
+        _expire_jobs_locked()
+        for job in _jobs.values():
+            if job["status"] not in _FINISHED_STATUSES and job["key"] == list(key):
+                return {"status": "error", "msg": f"Этот проект уже скачивается (job {job['job_id']})"}
+
+        job_id = uuid.uuid4().hex[:12]
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "kind": kind,
+            "key": list(key),
+            "course_id": course_id,
+            "project_name": project_name,
+            "student_name": student_name,
+            "status": "queued",
+            "stage": "queued",
+            "percent": 0,
+            "message": "В очереди...",
+            "bytes_done": 0,
+            "bytes_total": None,
+            "speed": None,
+            "eta": None,
+            "timings": {},
+            "result": None,
+            "created": time.time(),
+            "finished": None,
+        }
+        _job_controls[job_id] = {"cancel": threading.Event(), "future": None,
+                                 "progress": ProgressReporter(job_id)}
+
+    future = _get_download_executor().submit(_run_job, job_id)
+    with _jobs_lock:
+        _job_controls[job_id]["future"] = future
+    _emit_job_event(job_id)
+    return job_id
+
+
+def _expire_jobs_locked():
+    """Забывает задачи, завершенные больше JOB_KEEP_SECONDS назад (под _jobs_lock)."""
+    now = time.time()
+    for job_id in [j for j, job in _jobs.items()
+                   if job["finished"] and now - job["finished"] > JOB_KEEP_SECONDS]:
+        del _jobs[job_id]
+        _job_controls.pop(job_id, None)
+
+
+def _run_job(job_id):
+    """Выполняет задачу в рабочем потоке и записывает итоговый статус."""
+    with _jobs_lock:
+        job = _jobs[job_id]
+        job["status"] = "running"
+        course_id = job["course_id"]
+        project_name = job["project_name"]
+        student_name = job["student_name"]
+        handler = _update_installed if job["kind"] == "update" else _download_and_install
+    _emit_job_event(job_id)
 
-    # 2. Ищем URL (по старой логике)
-    target_url = None
     try:
-        with open('data.json', 'r', encoding='utf-8') as f:
-            data = json.load(f)
-            for course in data:
-                if course['id'] == course_id:
-                    for proj in course['projects']:
-                        if proj['name'] == project_name:
-                            target_url = proj['github_url']
-                            break
+        _check_cancelled(job_id)
+        result = handler(job_id, course_id, project_name, student_name)
+        status = result.get("status", "error")
+    except DownloadCancelled:
+        result = {"status": "cancelled", "msg": "Загрузка отменена"}
+        status = "cancelled"
     except Exception as e:
-        return {"status": "error", "msg": f"Config error: {e}"}
+        print(f"Job {job_id} crashed: {e}")
+        result = {"status": "error", "msg": str(e)}
+        status = "error"
+
+    with _jobs_lock:
+        job["status"] = status
+        job["result"] = result
+        job["finished"] = time.time()
+        if status != "success":
+            job["message"] = result.get("msg", status)
+    _emit_job_event(job_id)
+    return result
+
+
+def _wait_for_job(job_id, poll_interval=0.1):
+    """Ждет завершения задачи, не блокируя gevent-цикл eel."""
+    while True:
+        with _jobs_lock:
+            job = _jobs.get(job_id)
+            if job is None:
+                return {"status": "error", "msg": "Unknown job"}
+            if job["status"] in _FINISHED_STATUSES:
+                return job["result"]
+        eel.sleep(poll_interval)
+
+
+@eel.expose
+def enqueue_download(course_id, project_name, student_name):
+    """Ставит загрузку в очередь и сразу возвращает ее job_id."""
+    job_id = _submit_download(course_id, project_name, student_name)
+    if isinstance(job_id, dict):
+        return job_id
+    return {"status": "queued", "job_id": job_id}
+
+
+@eel.expose
+def get_download_status(job_id=None):
+    """Состояние одной задачи или список всех задач (если job_id не передан)."""
+    with _jobs_lock:
+        _expire_jobs_locked()
+        if job_id is None:
+            return [dict(job) for job in _jobs.values()]
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+
+@eel.expose
+def cancel_download(job_id):
+    """Отменяет задачу: из очереди убирает сразу, запущенную — на ближайшем чанке."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        control = _job_controls.get(job_id)
+        if not job or not control:
+            return {"status": "error", "msg": "Unknown job"}
+        if job["status"] in _FINISHED_STATUSES:
+            return {"status": "error", "msg": f"Задача уже завершена ({job['status']})"}
+
+        control["cancel"].set()
+        future = control["future"]
+        if future is not None and future.cancel():
+            # Задача еще не стартовала — помечаем сами
+            job["status"] = "cancelled"
+            job["result"] = {"status": "cancelled", "msg": "Загрузка отменена"}
+            job["message"] = "Отменено"
+            job["finished"] = time.time()
+    _emit_job_event(job_id)
+    return {"status": "success"}
+
+
+@eel.expose
+def update_project(course_id, project_name, student_name):
+    """
+    Ставит в очередь обновление установленного проекта до свежего шаблона:
+    пишутся только новые и изменившиеся файлы, правки ученика не трогаются.
+    """
+    job_id = _submit_download(course_id, project_name, student_name, kind="update")
+    if isinstance(job_id, dict):
+        return job_id
+    return {"status": "queued", "job_id": job_id}
+
+
+@eel.expose
+def download_project(course_id, project_name, student_name, project_index=0):
+    """
+    Старый синхронный API: ставит задачу в очередь и ждет результат.
+    project_index больше не используется (прогресс идет по job_id).
+    """
+    job_id = _submit_download(course_id, project_name, student_name)
+    if isinstance(job_id, dict):
+        return job_id
+    return _wait_for_job(job_id)
+
+
+# --- HTTP КЛИЕНТ (SESSION + RETRY) ---
+# Одна общая requests.Session на всё приложение: соединения с github.com
+# переиспользуются (keep-alive), а не открываются заново для каждой загрузки.
+# Таймауты и повторы настраиваются в config.json.
+
+DEFAULT_HTTP_CONNECT_TIMEOUT = 10
+DEFAULT_HTTP_READ_TIMEOUT = 30
+DEFAULT_HTTP_RETRIES = 3
+DEFAULT_HTTP_BACKOFF = 0.5  # секунды, база для экспоненциальной паузы
+HTTP_MAX_BACKOFF = 30
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_http_session = None
+_http_lock = threading.Lock()
+_http_latencies = collections.deque(maxlen=500)  # (host, status, секунды до заголовков)
+
+
+def _get_http_session():
+    """Создает общую Session с пулом соединений при первом обращении."""
+    global _http_session
+    import requests
+
+    with _http_lock:
+        if _http_session is None:
+            pool_size = _download_worker_count() + 2
+            adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers["User-Agent"] = "DigisCool-Launcher"
+            _http_session = session
+        return _http_session
+
+
+def _on_http_settings_changed(changes):
+    """Размер пула зависит от max_parallel_downloads: при изменении создаем новую сессию."""
+    global _http_session
+    if "max_parallel_downloads" in changes:
+        with _http_lock:
+            _http_session = None  # Старая сессия доработает текущие загрузки
+
+
+_settings.subscribe(_on_http_settings_changed)
+
 
-    if not target_url:
+def _backoff_delay(attempt, base=DEFAULT_HTTP_BACKOFF):
+    """Экспоненциальная пауза с jitter: base * 2^(attempt-1) + случайная добавка."""
+    delay = min(HTTP_MAX_BACKOFF, base * (2 ** (attempt - 1)))
+    return delay + random.uniform(0, delay)
+
+
+def _http_get(url, headers=None, stream=True):
+    """
+    GET через общую сессию: таймауты из конфига, повторы временных ошибок
+    (обрыв связи, таймаут, 429/5xx) с экспоненциальной паузой.
+    """
+    import requests
+
+    timeout = (
+        _config_number("http_connect_timeout", DEFAULT_HTTP_CONNECT_TIMEOUT),
+        _config_number("http_read_timeout", DEFAULT_HTTP_READ_TIMEOUT),
+    )
+    retries = max(0, int(_config_number("http_retries", DEFAULT_HTTP_RETRIES)))
+    backoff = _config_number("http_backoff", DEFAULT_HTTP_BACKOFF)
+    host = urllib.parse.urlsplit(url).netloc
+    session = _get_http_session()
+
+    for attempt in range(1, retries + 2):
+        started = time.perf_counter()
+        try:
+            response = session.get(url, headers=headers, stream=stream, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            _http_latencies.append((host, None, time.perf_counter() - started))
+            if attempt > retries:
+                raise
+            delay = _backoff_delay(attempt, backoff)
+            print(f"⚠️ HTTP {host}: {e.__class__.__name__}, retry in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+
+        _http_latencies.append((host, response.status_code, time.perf_counter() - started))
+        if response.status_code not in RETRY_STATUS_CODES or attempt > retries:
+            return response
+
+        # Сервер сам может подсказать, сколько ждать
+        delay = _backoff_delay(attempt, backoff)
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = min(HTTP_MAX_BACKOFF, int(retry_after))
+        response.close()
+        print(f"⚠️ HTTP {host}: {response.status_code}, retry in {delay:.1f}s")
+        time.sleep(delay)
+
+
+def _percentile(values, fraction):
+    """Перцентиль по отсортированному списку (ближайший ранг)."""
+    if not values:
+        return None
+    index = min(len(values) - 1, int(round(fraction * (len(values) - 1))))
+    return values[index]
+
+
+@eel.expose
+def get_http_stats():
+    """Задержка до получения заголовков по хостам (последние 500 запросов), в мс."""
+    by_host = {}
+    for host, status, latency in list(_http_latencies):
+        stats = by_host.setdefault(host, {"requests": 0, "errors": 0, "latencies": []})
+        stats["requests"] += 1
+        if status is None or status >= 400:
+            stats["errors"] += 1
+        stats["latencies"].append(latency * 1000)
+
+    for stats in by_host.values():
+        latencies = sorted(stats.pop("latencies"))
+        stats["p50_ms"] = round(_percentile(latencies, 0.5), 1)
+        stats["p95_ms"] = round(_percentile(latencies, 0.95), 1)
+    return by_host
+
+
+# --- КЭШ АРХИВОВ (ARCHIVE CACHE) ---
+# Скачанные zip лежат в ~/.digiscool/cache, ключ — URL.
+# Для каждого URL храним ETag / Last-Modified и перед использованием
+# переспрашиваем сервер (If-None-Match / If-Modified-Since):
+# если шаблон не менялся, GitHub отвечает 304 и мы берем файл с диска.
+
+DEFAULT_CACHE_MAX_MB = 2048
+DEFAULT_DOWNLOAD_ATTEMPTS = 3
+
+# Распаковка: файлы копируются кусками, запись идет в несколько потоков
+EXTRACT_CHUNK_SIZE = 1024 * 1024
+EXTRACT_BATCH_FILES = 64
+EXTRACT_BATCH_BYTES = 8 * 1024 * 1024
+DEFAULT_EXTRACT_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+_cache_lock = threading.Lock()
+_cache_index = None  # url -> {"file", "etag", "last_modified", "size", "sha256", "last_used"}
+_cache_stats = {"hits": 0, "misses": 0, "evictions": 0}
+# Архивы, которые сейчас читают задачи: имя файла -> сколько задач его держат.
+# LRU их не трогает; файл, выпавший из индекса, удаляется при последнем _cache_unpin.
+_cache_pins = collections.Counter()
+_url_locks = {}  # url -> Lock: один и тот же шаблон не качаем двумя потоками сразу
+
+
+def _get_app_data_dir():
+    """Служебная папка приложения (кэш, индексы): ~/.digiscool"""
+    path = os.path.join(os.path.expanduser("~"), ".digiscool")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _get_cache_dir():
+    path = os.path.join(_get_app_data_dir(), "cache")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _cache_key(url):
+    """Имя файла в кэше для URL."""
+    return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+
+def _load_cache_index_locked():
+    """Читает index.json кэша один раз за запуск (вызывать под _cache_lock)."""
+    global _cache_index
+    if _cache_index is None:
+        index_path = os.path.join(_get_cache_dir(), "index.json")
+        _cache_index = {}
+        if os.path.exists(index_path):
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    _cache_index = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Cache index is broken, starting fresh: {e}")
+    return _cache_index
+
+
+def _save_cache_index_locked():
+    """Атомарно сохраняет index.json (через временный файл + rename)."""
+    _atomic_write_json(os.path.join(_get_cache_dir(), "index.json"), _cache_index, indent=4)
+
+
+def _get_cache_max_bytes():
+    return int(_config_number("cache_max_mb", DEFAULT_CACHE_MAX_MB) * 1024 * 1024)
+
+
+def _get_url_lock(url):
+    with _cache_lock:
+        return _url_locks.setdefault(url, threading.Lock())
+
+
+def _cache_get(url, pin=False):
+    """
+    Возвращает копию записи кэша или None (если файла на диске уже нет).
+    pin=True — файл закрепляется за вызывающим (потом обязательно _cache_unpin).
+    """
+    with _cache_lock:
+        index = _load_cache_index_locked()
+        entry = index.get(url)
+        if not entry:
+            return None
+        path = os.path.join(_get_cache_dir(), entry["file"])
+        if not os.path.exists(path):
+            del index[url]
+            _save_cache_index_locked()
+            return None
+        if pin:
+            _cache_pins[entry["file"]] += 1
+        return dict(entry, path=path)
+
+
+def _cache_find_digest(sha256):
+    """
+    Ищет в кэше архив с таким SHA-256 (под любым URL). Копия записи или None.
+    Найденный файл закрепляется (потом обязательно _cache_unpin).
+    """
+    with _cache_lock:
+        index = _load_cache_index_locked()
+        for entry in index.values():
+            if entry.get("sha256") == sha256:
+                path = os.path.join(_get_cache_dir(), entry["file"])
+                if os.path.exists(path):
+                    _cache_pins[entry["file"]] += 1
+                    return dict(entry, path=path)
+        return None
+
+
+def _cache_unpin(path):
+    """Задача больше не читает архив. Если его уже выселили из индекса — удаляем."""
+    file_name = os.path.basename(path)
+    with _cache_lock:
+        _cache_pins[file_name] -= 1
+        if _cache_pins[file_name] <= 0:
+            del _cache_pins[file_name]
+            _cache_release_locked(file_name)
+            # Пока архив был закреплен, кэш мог вырасти сверх лимита — выселяем сейчас
+            _load_cache_index_locked()
+            evictions = _cache_stats["evictions"]
+            _evict_cache_locked(_get_cache_max_bytes())
+            if _cache_stats["evictions"] != evictions:
+                _save_cache_index_locked()
+
+
+def _cache_hit(url, alias=None):
+    """
+    Отмечает попадание в кэш (для LRU и статистики).
+    alias — запись с тем же SHA-256 под другим URL: URL начинает ссылаться на ее файл.
+    """
+    with _cache_lock:
+        index = _load_cache_index_locked()
+        if alias is not None and index.get(url, {}).get("file") != alias["file"]:
+            previous = index.get(url)
+            index[url] = {key: alias[key] for key in alias if key != "path"}
+            index[url]["etag"] = index[url]["last_modified"] = None  # Валидаторы были от другого URL
+            if previous:
+                _cache_release_locked(previous["file"])
+        if url in index:
+            index[url]["last_used"] = time.time()
+            _save_cache_index_locked()
+        _cache_stats["hits"] += 1
+
+
+def _cache_put(url, downloaded_path, etag, last_modified, sha256):
+    """
+    Кладет скачанный файл в кэш и выселяет старые архивы сверх лимита.
+    Имя файла — SHA-256 содержимого: одинаковые архивы с разных URL хранятся один раз.
+    """
+    file_name = sha256 + ".zip"
+    path = os.path.join(_get_cache_dir(), file_name)
+
+    with _cache_lock:
+        # Решаем под замком: выселение в другом потоке не удалит файл между проверкой и закреплением
+        if os.path.exists(path):
+            os.remove(downloaded_path)  # Такой же архив уже лежит (возможно, его сейчас читают)
+        else:
+            os.replace(downloaded_path, path)
+        index = _load_cache_index_locked()
+        previous = index.get(url)
+        index[url] = {
+            "file": file_name,
+            "etag": etag,
+            "last_modified": last_modified,
+            "size": os.path.getsize(path),
+            "sha256": sha256,
+            "last_used": time.time(),
+        }
+        _cache_pins[file_name] += 1  # Новый архив держит задача, которая его скачала
+        if previous:
+            _cache_release_locked(previous["file"])
+        _cache_stats["misses"] += 1
+        _evict_cache_locked(_get_cache_max_bytes(), keep_url=url)
+        _save_cache_index_locked()
+    return path
+
+
+def _cache_release_locked(file_name):
+    """
+    Удаляет файл архива, если на него больше не ссылается ни один URL и его
+    не читает ни одна задача. True — файла больше нет на диске.
+    """
+    if file_name in _cache_pins or any(entry["file"] == file_name for entry in _cache_index.values()):
+        return False
+    try:
+        os.remove(os.path.join(_get_cache_dir(), file_name))
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        # Windows: файл открыт кем-то еще — удалим при следующем выселении/запуске
+        print(f"Cannot remove cached archive {file_name}: {e}")
+        return False
+    return True
+
+
+def _cache_drop(url):
+    """Удаляет запись (например, если архив оказался битым)."""
+    with _cache_lock:
+        index = _load_cache_index_locked()
+        entry = index.pop(url, None)
+        if entry:
+            _cache_release_locked(entry["file"])
+            _save_cache_index_locked()
+
+
+def _cache_size_locked():
+    """Размер кэша на диске: общий файл нескольких URL считается один раз."""
+    return sum({entry["file"]: entry["size"] for entry in _cache_index.values()}.values())
+
+
+def _evict_cache_locked(max_bytes, keep_url=None):
+    """LRU: удаляет давно не использованные архивы, пока кэш больше лимита."""
+    index = _cache_index
+    total = _cache_size_locked()
+    for url in sorted(index, key=lambda u: index[u]["last_used"]):
+        if total <= max_bytes:
+            break
+        entry = index[url]
+        if url == keep_url or entry["file"] in _cache_pins:
+            continue  # Архив сейчас распаковывают — выселим в другой раз
+        del index[url]
+        if _cache_release_locked(entry["file"]):
+            total -= entry["size"]
+            _cache_stats["evictions"] += 1
+        elif not any(other["file"] == entry["file"] for other in index.values()):
+            index[url] = entry  # Файл не удалился — запись оставляем, иначе он потеряется
+
+
+@eel.expose
+def get_cache_stats():
+    """Статистика кэша архивов для Frontend."""
+    with _cache_lock:
+        index = _load_cache_index_locked()
+        return dict(
+            _cache_stats,
+            entries=len(index),
+            size_bytes=_cache_size_locked(),
+            max_bytes=_get_cache_max_bytes(),
+        )
+
+
+def _part_paths(url):
+    """Недокачанный файл и его sidecar-состояние (offset, валидатор)."""
+    base = os.path.join(_get_cache_dir(), _cache_key(url) + ".part")
+    return base, base + ".json"
+
+
+def _load_part_state(url):
+    """
+    Читает состояние недокачанного файла. Возвращает dict с offset или None,
+    если докачивать нечего (нет файла, другой URL или нет валидатора).
+    """
+    part_path, state_path = _part_paths(url)
+    if not (os.path.exists(part_path) and os.path.exists(state_path)):
+        return None
+    try:
+        with open(state_path, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("url") != url:
+        return None
+
+    # If-Range допускает только "сильный" ETag, слабый (W/...) не подходит
+    etag = state.get("etag")
+    validator = etag if etag and not etag.startswith("W/") else state.get("last_modified")
+    if not validator:
+        return None
+
+    state["validator"] = validator
+    state["offset"] = os.path.getsize(part_path)
+    return state
+
+
+def _save_part_state(url, etag, last_modified, total):
+    _, state_path = _part_paths(url)
+    _atomic_write_json(state_path, {"url": url, "etag": etag, "last_modified": last_modified, "total": total})
+
+
+def _drop_partial(url):
+    for path in _part_paths(url):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _fetch_archive(job_id, url, extract_to=None, sha256=None, size=None):
+    """
+    Возвращает (путь к zip в кэше, распакован_ли_уже).
+    Если в кэше есть архив — спрашивает сервер, изменился ли он (условный запрос).
+    Иначе скачивает заново; если передан extract_to, распаковывает прямо из потока.
+    Если связь оборвалась, недокачанный файл остается на диске и следующая
+    попытка продолжает с того же байта (HTTP Range). download_attempts — сколько
+    обрывов подряд без единого нового байта терпим.
+    sha256 / size из data.json проверяются во время скачивания (IntegrityError).
+    Возвращенный архив закреплен в кэше: после использования — _cache_unpin(путь).
+    """
+    import requests
+
+    attempts = max(1, int(_config_number("download_attempts", DEFAULT_DOWNLOAD_ATTEMPTS)))
+    backoff = _config_number("http_backoff", DEFAULT_HTTP_BACKOFF)
+    sha256 = sha256.lower() if sha256 else None
+
+    with _get_url_lock(url):
+        failures = 0
+        while True:
+            state = _load_part_state(url)
+            offset = state["offset"] if state else 0
+            try:
+                return _fetch_archive_once(job_id, url, extract_to, sha256, size)
+            except (requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError, IncompleteDownload) as e:
+                # Попытка, которая докачала хоть что-то, лимит не тратит: считаем обрывы подряд без прогресса
+                state = _load_part_state(url)
+                failures = 1 if state and state["offset"] > offset else failures + 1
+                if failures >= attempts:
+                    raise
+                print(f"⚠️ [{job_id}] Download interrupted ({e}), retry {failures}/{attempts - 1}")
+                _get_reporter(job_id).stage("connect", "Связь прервалась, докачиваем...")
+                time.sleep(_backoff_delay(failures, backoff))
+
+
+def _hash_file(path, hasher):
+    """Досчитывает hasher по уже скачанной части файла (нужно при докачке)."""
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(EXTRACT_CHUNK_SIZE), b''):
+            hasher.update(chunk)
+    return hasher
+
+
+def _fetch_archive_once(job_id, url, extract_to=None, sha256=None, size=None):
+    """Одна попытка скачивания (с докачкой, если есть недокачанный файл)."""
+    if sha256:
+        # Содержимое закреплено хешем: подходит любой архив с тем же SHA-256, сеть не нужна
+        pinned = _cache_find_digest(sha256)
+        if pinned:
+            if size is not None and pinned["size"] != size:
+                _cache_unpin(pinned["path"])
+                raise IntegrityError(f"size mismatch: expected {size} bytes, cached archive has {pinned['size']}")
+            _cache_hit(url, alias=pinned)
+            print(f"📦 [{job_id}] Cache hit by sha256: {url}")
+            return pinned["path"], False
+
+    # Архив из кэша закрепляем: пока идет запрос, его может выселить другая задача
+    entry = _cache_get(url, pin=True)
+    if entry and not entry.get("sha256"):
+        _cache_unpin(entry["path"])
+        entry = None  # Запись без хеша (старый кэш) — качаем заново, чтобы посчитать его
+    try:
+        part_path, _ = _part_paths(url)
+        part_state = _load_part_state(url)
+
+        headers = {}
+        if part_state and part_state["offset"] > 0:
+            # Докачка: просим только недостающие байты. If-Range гарантирует,
+            # что если файл на сервере поменялся, придет полный ответ 200.
+            headers["Range"] = f"bytes={part_state['offset']}-"
+            headers["If-Range"] = part_state["validator"]
+        elif entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        _get_reporter(job_id).stage("connect", "Подключение к GitHub...")
+        with _span("connect", job_id=job_id, host=urllib.parse.urlsplit(url).hostname) as span:
+            response = _http_get(url, headers=headers)
+            span["status"] = response.status_code
+
+        if "Range" not in headers and entry and response.status_code == 304:
+            response.content  # Тело пустое: дочитываем, чтобы соединение вернулось в пул
+            if sha256 and entry["sha256"] != sha256:
+                raise IntegrityError(f"sha256 mismatch: expected {sha256}, server has {entry['sha256']}")
+            if size is not None and entry["size"] != size:
+                raise IntegrityError(f"size mismatch: expected {size} bytes, server has {entry['size']}")
+            _cache_hit(url)
+            print(f"📦 [{job_id}] Cache hit: {url}")
+            path, entry = entry["path"], None  # Закрепление переходит к вызывающему
+            return path, False
+
+        if response.status_code == 416:
+            # Сервер не может отдать этот диапазон — начинаем с нуля
+            response.close()
+            _drop_partial(url)
+            raise IncompleteDownload("Range not satisfiable, restarting from zero")
+
+        response.raise_for_status()
+
+        downloaded_size = 0
+        total_length = None
+        hasher = hashlib.sha256()
+        if response.status_code == 206:
+            # Сервер поддерживает Range: дописываем в конец
+            match = re.match(r'bytes (\d+)-\d+/(\d+|\*)', response.headers.get('Content-Range', ''))
+            if not match or int(match.group(1)) != part_state["offset"]:
+                response.close()
+                _drop_partial(url)
+                raise IncompleteDownload("Unexpected Content-Range, restarting from zero")
+            downloaded_size = part_state["offset"]
+            if match.group(2) != '*':
+                total_length = int(match.group(2))
+            mode = 'ab'
+            _hash_file(part_path, hasher)
+            print(f"⏯️ [{job_id}] Resuming from byte {downloaded_size}")
+        else:
+            # Полный ответ (Range не поддерживается или файл изменился)
+            content_length = response.headers.get('content-length')
+            total_length = int(content_length) if content_length is not None else None
+            mode = 'wb'
+            _save_part_state(url, response.headers.get('ETag'),
+                             response.headers.get('Last-Modified'), total_length)
+
+        if size is not None and total_length is not None and total_length != size:
+            # Сервер сразу сказал размер, и он не тот — не качаем ни байта
+            response.close()
+            _drop_partial(url)
+            raise IntegrityError(f"size mismatch: expected {size} bytes, server sends {total_length}")
+
+        # Потоковая распаковка возможна только когда архив идет с первого байта
+        stream_extract = (extract_to is not None and mode == 'wb'
+                          and _settings.get("stream_extract", True))
+        extracted = False
+
+        try:
+            # При потоковой распаковке transfer включает и распаковку (они идут одновременно)
+            with _span("transfer", job_id=job_id, stream=stream_extract) as span, \
+                    open(part_path, mode) as f:
+                resumed_from = downloaded_size
+                if stream_extract:
+                    downloaded_size, extracted = _download_with_stream_extract(
+                        job_id, response, f, total_length, extract_to, hasher, size)
+                else:
+                    downloaded_size = _write_response(job_id, response, f, downloaded_size,
+                                                      total_length, hasher=hasher, expected_size=size)
+                span["bytes"] = downloaded_size - resumed_from
+            if total_length is not None and downloaded_size != total_length:
+                raise IncompleteDownload(f"Got {downloaded_size} of {total_length} bytes")
+
+            digest = hasher.hexdigest()
+            if size is not None and downloaded_size != size:
+                raise IntegrityError(f"size mismatch: expected {size} bytes, got {downloaded_size}")
+            if sha256 and digest != sha256:
+                raise IntegrityError(f"sha256 mismatch: expected {sha256}, got {digest}")
+        except IntegrityError:
+            _drop_partial(url)  # Докачивать неправильный файл бессмысленно
+            raise
+
+        state = _load_part_state(url) or {}
+        path = _cache_put(
+            url, part_path,
+            etag=state.get("etag", response.headers.get('ETag')),
+            last_modified=state.get("last_modified", response.headers.get('Last-Modified')),
+            sha256=digest,
+        )
+        _drop_partial(url)
+        return path, extracted
+    finally:
+        if entry:
+            _cache_unpin(entry["path"])
+
+
+def _write_response(job_id, response, f, downloaded_size, total_length, on_chunk=None,
+                    hasher=None, expected_size=None):
+    """
+    Пишет тело ответа в файл по 64 КБ и обновляет прогресс.
+    on_chunk (если задан) получает каждый чанк — так работает потоковая распаковка.
+    hasher (hashlib) считается по тем же чанкам, второго прохода по файлу нет.
+    Возвращает итоговое число байт в файле.
+    """
+    chunk_size = 1024 * 64  # Читаем по 64 КБ
+    reporter = _get_reporter(job_id)
+    reporter.stage("download", "Загрузка...")
+
+    # Если сервер не сказал размер (total_length=None), показываем скачанные МБ и скорость
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        _check_cancelled(job_id)
+        f.write(chunk)
+        if hasher:
+            hasher.update(chunk)
+        downloaded_size += len(chunk)
+        if expected_size is not None and downloaded_size > expected_size:
+            raise IntegrityError(f"size mismatch: expected {expected_size} bytes, got more")
+        if on_chunk:
+            on_chunk(chunk)
+        reporter.bytes(downloaded_size, total_length)
+
+    reporter.bytes(downloaded_size, total_length, force=True)
+    return downloaded_size
+
+
+def _member_rel_path(name, root):
+    """
+    Путь файла внутри проекта или None, если файл пропускаем.
+    GitHub кладет всё в папку "repo-name-main", ее убираем:
+    "game-main/Assets/Script.cs" -> "Assets/Script.cs"
+    """
+    # Пропускаем саму корневую папку
+    if name == root:
+        return None
+    rel_path = name[len(root):]
+
+    # Пропускаем пустые пути и MACOSX мусор
+    if not rel_path or rel_path.startswith("__MACOSX") or rel_path.startswith("."):
+        return None
+
+    # Защита от "../" в именах (zip slip)
+    normalized = os.path.normpath(rel_path)
+    if normalized.startswith("..") or os.path.isabs(normalized):
+        return None
+    return rel_path
+
+
+def _extract_archive(job_id, zip_path, target_dir):
+    """
+    Распаковка из файла на диске (zip уже целиком скачан).
+    Каждый файл копируется кусками по EXTRACT_CHUNK_SIZE (память не растет от размера
+    ассета), папки создаются один раз заранее, запись файлов идет в пуле потоков.
+    Возвращает статистику: файлы, байты, секунды, файлов/сек.
+    """
+    import zipfile
+
+    started = time.perf_counter()
+
+    with zipfile.ZipFile(zip_path, 'r') as z:
+        # GitHub кладет всё в папку "repo-name-main", нам надо вытащить содержимое
+        root_folder_inside_zip = z.namelist()[0]
+
+        # План: какие папки создать и какие файлы куда писать
+        dirs = set()
+        batches = [[]]
+        batch_bytes = 0
+        for info in z.infolist():
+            rel_path = _member_rel_path(info.filename, root_folder_inside_zip)
+            if rel_path is None:
+                continue
+
+            dest_path = os.path.join(target_dir, rel_path)
+            if info.is_dir():
+                dirs.add(os.path.normpath(dest_path))
+                continue
+
+            dirs.add(os.path.dirname(dest_path))
+            # Мелкие файлы отдаем потокам пачками, чтобы не платить за задачу на каждый
+            if batch_bytes >= EXTRACT_BATCH_BYTES or len(batches[-1]) >= EXTRACT_BATCH_FILES:
+                batches.append([])
+                batch_bytes = 0
+            batches[-1].append((info, dest_path))
+            batch_bytes += info.file_size
+
+    # Сортировка: родители раньше детей, каждая папка — один вызов makedirs
+    for path in sorted(dirs, key=len):
+        os.makedirs(path, exist_ok=True)
+
+    workers = max(1, int(_config_number("extract_workers", DEFAULT_EXTRACT_WORKERS)))
+    local = threading.local()
+    handles = []
+    handles_lock = threading.Lock()
+
+    def extract_batch(batch):
+        # ZipFile не любит параллельное чтение через один дескриптор: у каждого потока свой
+        z = getattr(local, "zip", None)
+        if z is None:
+            z = local.zip = zipfile.ZipFile(zip_path, 'r')
+            with handles_lock:
+                handles.append(z)
+
+        written = 0
+        for info, dest_path in batch:
+            _check_cancelled(job_id)
+            _unlink_shared(dest_path)
+            with z.open(info) as src, open(dest_path, "wb") as f_out:
+                shutil.copyfileobj(src, f_out, EXTRACT_CHUNK_SIZE)
+            written += info.file_size
+        return len(batch), written
+
+    files = 0
+    total_bytes = 0
+    total_files = sum(len(batch) for batch in batches)
+    reporter = _get_reporter(job_id)
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"extract-{job_id}") as pool:
+            futures = [pool.submit(extract_batch, batch) for batch in batches if batch]
+            try:
+                for future in futures:
+                    count, written = future.result()
+                    files += count
+                    total_bytes += written
+                    reporter.items(files, total_files)
+            except BaseException:
+                # Первая ошибка (или отмена) — остальные пачки не начинаем
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        for z in handles:
+            z.close()
+
+    seconds = time.perf_counter() - started
+    stats = {
+        "files": files,
+        "bytes": total_bytes,
+        "seconds": round(seconds, 3),
+        "files_per_sec": round(files / seconds, 1) if seconds > 0 else None,
+    }
+    print(f"🗜️ [{job_id}] Extracted {files} files in {stats['seconds']}s "
+          f"({stats['files_per_sec']} files/s, {workers} threads)")
+    return stats
+
+
+# --- ХРАНИЛИЩЕ ШАБЛОНОВ (TEMPLATE STORE) ---
+# Каждая версия архива распаковывается один раз в ~/.digiscool/templates/<url>-<версия>.
+# Папка ученика заполняется из этой копии:
+#   reflink  — копия-клон (copy-on-write на уровне ФС: Btrfs, XFS). Мгновенно и без
+#              лишнего места, при записи ученик получает свою копию блоков;
+#   hardlink — общие файлы без копирования. Чтобы правки одного ученика не попали
+#              к другим, по ссылке отдаются только ассеты (картинки, модели, jar...),
+#              а исходники, которые ученики редактируют, всегда копируются.
+#              Copy-on-write здесь нет: программа, которая пишет в файл на месте
+#              (а не сохраняет новый файл поверх), меняет его у всех учеников и в
+#              шаблоне. Поэтому режим небезопасен для таких редакторов и движков и
+#              включается только вручную; сам лаунчер перед записью в папку ученика
+#              всегда разрывает ссылку (_unlink_shared);
+#   copy     — обычное копирование.
+# provision_mode = "auto" пробует reflink и при неудаче копирует. reflink есть
+# только на Linux (FICLONE), поэтому на Windows и macOS "auto" — это copy.
+
+DEFAULT_PROVISION_MODE = "auto"
+FICLONE = 0x40049409  # ioctl Linux для reflink
+
+# Файлы, которые ученики правят сами: в режиме hardlink их всегда копируем
+EDITABLE_EXTENSIONS = {
+    ".cs", ".java", ".py", ".js", ".ts", ".html", ".css", ".json", ".txt", ".md",
+    ".xml", ".gradle", ".properties", ".toml", ".yml", ".yaml", ".cfg", ".ini",
+    ".mcmeta", ".lang", ".asset", ".unity", ".prefab", ".mat", ".meta", ".asmdef",
+    ".shader", ".csproj", ".sln", ".bat", ".sh",
+}
+
+_template_lock = threading.Lock()
+_template_pins = collections.Counter()  # папка шаблона -> сколько задач сейчас копирует из нее
+_template_retired = set()  # закрепленные папки, которые удалим, когда их отпустит последняя задача
+_reflink_unsupported = set()  # st_dev файловых систем, где reflink не работает
+
+
+def _get_templates_dir():
+    path = os.path.join(_get_app_data_dir(), "templates")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _template_dir_for(url):
+    """Папка шаблона для текущей версии архива в кэше (версия = ETag/Last-Modified/размер)."""
+    entry = _cache_get(url) or {}
+    version = f"{entry.get('etag')}|{entry.get('last_modified')}|{entry.get('size')}"
+    version_key = hashlib.sha1(version.encode('utf-8')).hexdigest()[:12]
+    return os.path.join(_get_templates_dir(), f"{_cache_key(url)[:16]}-{version_key}")
+
+
+def _template_manifest(path):
+    """{относительный путь: [размер, mtime_ns]} всех файлов шаблона."""
+    manifest = {}
+    for root, _, files in os.walk(path):
+        for name in files:
+            full = os.path.join(root, name)
+            st = os.stat(full)
+            manifest[os.path.relpath(full, path)] = [st.st_size, st.st_mtime_ns]
+    return manifest
+
+
+def _template_ready(template_dir, verify=False):
+    """
+    Есть ли готовый шаблон (вызывать под _template_lock). verify=True (режим
+    hardlink) дополнительно сверяет размеры и mtime: если кто-то изменил общий
+    файл, шаблон пересоздается.
+    """
+    manifest_path = template_dir + ".json"
+    if not (os.path.isdir(template_dir) and os.path.exists(manifest_path)):
+        return False
+    if not verify:
+        return True
+
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            expected = json.load(f)
+        if _template_manifest(template_dir) == expected:
+            return True
+    except (OSError, ValueError):
+        pass
+
+    print(f"♻️ Template changed on disk, rebuilding: {template_dir}")
+    _retire_template_locked(template_dir)
+    return False
+
+
+def _acquire_template(template_dir, verify=False):
+    """Если шаблон готов — закрепляет его и возвращает True. Потом — _release_template."""
+    with _template_lock:
+        if not _template_ready(template_dir, verify=verify):
+            return False
+        _template_pins[template_dir] += 1
+        return True
+
+
+def _release_template(template_dir):
+    """Задача закончила копировать из шаблона; отложенное удаление выполняется здесь."""
+    with _template_lock:
+        _template_pins[template_dir] -= 1
+        if _template_pins[template_dir] > 0:
+            return
+        del _template_pins[template_dir]
+        if template_dir in _template_retired:
+            _template_retired.discard(template_dir)
+            _drop_template(template_dir)
+
+
+def _retire_template_locked(template_dir):
+    """
+    Удаляет шаблон, а если из него сейчас копируют — только снимает манифест
+    (новые задачи его не возьмут) и удаляет папку после _release_template.
+    """
+    if template_dir not in _template_pins:
+        _drop_template(template_dir)
+        return
+    _template_retired.add(template_dir)
+    if os.path.exists(template_dir + ".json"):
+        os.remove(template_dir + ".json")
+
+
+def _drop_template(template_dir):
+    # Ученики, у которых файлы связаны hardlink-ом, свои копии не теряют
+    if os.path.exists(template_dir + ".json"):
+        os.remove(template_dir + ".json")
+    shutil.rmtree(template_dir, ignore_errors=True)
+
+
+def _finalize_template(staging_dir, template_dir):
+    """
+    Переносит распакованный шаблон в хранилище (или отдает уже готовый).
+    Возвращает папку, из которой копировать ученику: шаблон из хранилища
+    закреплен (_release_template). Если по этому пути еще читают старую копию,
+    возвращается сама staging_dir — она не закреплена и удаляется задачей.
+    """
+    with _template_lock:
+        if _template_ready(template_dir):
+            # Параллельная задача успела раньше
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            _template_pins[template_dir] += 1
+            return template_dir
+        if template_dir in _template_pins:
+            return staging_dir
+
+        shutil.rmtree(template_dir, ignore_errors=True)
+        os.makedirs(staging_dir, exist_ok=True)  # Пустой архив — пустой шаблон
+        os.replace(staging_dir, template_dir)
+        _atomic_write_json(template_dir + ".json", _template_manifest(template_dir))
+        _template_pins[template_dir] += 1
+
+        # Старые версии этого же шаблона больше не нужны
+        prefix = os.path.basename(template_dir).rsplit("-", 1)[0] + "-"
+        for name in os.listdir(_get_templates_dir()):
+            path = os.path.join(_get_templates_dir(), name)
+            if name.startswith(prefix) and os.path.isdir(path) and path != template_dir \
+                    and not name.endswith(".tmp"):
+                _retire_template_locked(path)  # Ее могут еще копировать другим ученикам
+
+    return template_dir
+
+
+def _unlink_shared(path):
+    """
+    Удаляет файл, если он связан hardlink-ом (st_nlink > 1): запись в него
+    попала бы в шаблон и к другим ученикам. Вызывать перед перезаписью файла.
+    """
+    try:
+        if os.stat(path).st_nlink > 1:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _reflink(src, dst):
+    """Клонирует файл через FICLONE (Linux). OSError, если ФС не умеет."""
+    import fcntl  # Есть только на POSIX
+    with open(src, 'rb') as f_src, open(dst, 'wb') as f_dst:
+        fcntl.ioctl(f_dst.fileno(), FICLONE, f_src.fileno())
+
+
+def _provision_file(src, dst, mode, dst_dev):
+    """Кладет один файл в папку ученика. Возвращает способ: reflink / hardlink / copy."""
+    _unlink_shared(dst)  # Переустановка поверх hardlink-а не должна писать в шаблон
+    if mode in ("auto", "reflink") and sys.platform.startswith("linux") \
+            and dst_dev not in _reflink_unsupported:
+        try:
+            _reflink(src, dst)
+            return "reflink"
+        except (OSError, ImportError):
+            _reflink_unsupported.add(dst_dev)
+
+    if mode == "hardlink" and os.path.splitext(src)[1].lower() not in EDITABLE_EXTENSIONS:
+        try:
+            if os.path.lexists(dst):
+                os.remove(dst)
+            os.link(src, dst)
+            return "hardlink"
+        except OSError:
+            pass  # Другой диск или ФС без hardlink — копируем
+
+    shutil.copyfile(src, dst)
+    return "copy"
+
+
+def _provision_from_template(job_id, template_dir, target_dir):
+    """Заполняет папку ученика из шаблона. Возвращает статистику."""
+    started = time.perf_counter()
+    mode = _settings.get("provision_mode", DEFAULT_PROVISION_MODE)
+    dst_dev = os.stat(target_dir).st_dev
+
+    plan = []
+    for root, dirs, files in os.walk(template_dir):
+        rel_root = os.path.relpath(root, template_dir)
+        dest_root = target_dir if rel_root == "." else os.path.join(target_dir, rel_root)
+        os.makedirs(dest_root, exist_ok=True)
+        for name in files:
+            plan.append((os.path.join(root, name), os.path.join(dest_root, name)))
+
+    reporter = _get_reporter(job_id)
+    counts = collections.Counter()
+    workers = max(1, int(_config_number("extract_workers", DEFAULT_EXTRACT_WORKERS)))
+
+    def provision_batch(batch):
+        used = collections.Counter()
+        for src, dst in batch:
+            _check_cancelled(job_id)
+            used[_provision_file(src, dst, mode, dst_dev)] += 1
+        return used
+
+    batches = [plan[i:i + EXTRACT_BATCH_FILES] for i in range(0, len(plan), EXTRACT_BATCH_FILES)]
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"provision-{job_id}") as pool:
+        futures = [pool.submit(provision_batch, batch) for batch in batches]
+        try:
+            for future in futures:
+                counts.update(future.result())
+                reporter.items(sum(counts.values()), len(plan))
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+    stats = dict(counts, files=len(plan), mode=mode,
+                 seconds=round(time.perf_counter() - started, 3))
+    print(f"🧬 [{job_id}] Provisioned {len(plan)} files in {stats['seconds']}s {dict(counts)}")
+    return stats
+
+
+def _download_and_install(job_id, course_id, project_name, student_name):
+    import zipfile
+
+    # 1. Папка установки (настройки уже в памяти)
+    base_path = _get_base_path()
+
+    print(f"📥 [{job_id}] Downloading to: {base_path}")
+
+    # 2. Ищем URL в каталоге
+    with _span("catalog_lookup", job_id=job_id):
+        project = _catalog.get_project(course_id, project_name)
+    if not project:
+        if _catalog.error:
+            return {"status": "error", "msg": f"Config error: {_catalog.error}"}
         return {"status": "error", "msg": "GitHub URL not found!"}
+    target_url = project['github_url']
 
     # 3. Готовим папку назначения
-    folder_result = ensure_project_folder(base_path, course_id, student_name, project_name)
+    with _span("folder_create", job_id=job_id):
+        folder_result = ensure_project_folder(base_path, course_id, student_name, project_name)
     if folder_result['status'] == 'error':
         return folder_result
 
     target_dir = folder_result['path']
 
-    # Временный файл для скачивания (внутри целевой папки)
-    temp_zip_path = os.path.join(target_dir, "temp_download.zip")
+    # Шаблон распаковывается один раз в хранилище, ученику он копируется/клонируется
+    use_store = _settings.get("template_store", True)
+    staging_dir = None
+    if use_store:
+        staging_dir = os.path.join(_get_templates_dir(), f"{_cache_key(target_url)[:16]}.{job_id}.tmp")
 
+    zip_path = None
+    pinned_template = None
     try:
-        # --- СТАДИЯ 1: СКАЧИВАНИЕ (STREAM TO DISK) ---
-        eel.update_ui_progress(project_index, 0, "Подключение к GitHub...")
-
-        response = requests.get(target_url, stream=True)
-        total_length = response.headers.get('content-length')
-
-        # Открываем файл на диске для записи
-        with open(temp_zip_path, 'wb') as f:
-            downloaded_size = 0
-            chunk_size = 1024 * 64  # Читаем по 64 КБ
-
-            if total_length is None:
-                # Если GitHub не сказал размер -> показываем сколько скачали в МБ
-                # И делаем "фейковый" прогресс бар (бегает 10-90%)
-                fake_percent = 10
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    f.write(chunk)
-                    downloaded_size += len(chunk)
-                    mb = round(downloaded_size / (1024 * 1024), 1)
-
-                    # Простая анимация: 10 -> 90 -> 10
-                    fake_percent += 1
-                    if fake_percent > 90: fake_percent = 10
-
-                    # Обновляем UI (важно: eel.sleep дает интерфейсу дышать)
-                    if downloaded_size % (
-                            1024 * 512) == 0:  # Обновляем не каждый чанк, а каждые 0.5 МБ (чтобы не тормозить)
-                        eel.update_ui_progress(project_index, fake_percent, f"Скачано: {mb} MB...")
-                        eel.sleep(0.001)
-            else:
-                # Если размер известен -> честные проценты
-                total_length = int(total_length)
-                for chunk in response.iter_content(chunk_size=chunk_size):
-                    f.write(chunk)
-                    downloaded_size += len(chunk)
-                    percent = int((downloaded_size / total_length) * 100)
+        started = time.perf_counter()
+        reporter = _get_reporter(job_id)
+
+        # --- СТАДИЯ 1: СКАЧИВАНИЕ (или берем из кэша; новый архив распаковывается на лету) ---
+        # Без хранилища поток распаковывается прямо в папку ученика — а хеш известен
+        # только в конце. Поэтому закрепленный архив сначала проверяем, потом распаковываем.
+        verified = project.get('sha256') is not None or project.get('size') is not None
+        extract_to = staging_dir if use_store else (None if verified else target_dir)
+        zip_path, extracted = _fetch_archive(job_id, target_url, extract_to=extract_to,
+                                             sha256=project.get('sha256'), size=project.get('size'))
+
+        # --- СТАДИЯ 2: РАСПАКОВКА (если архив не удалось распаковать из потока) ---
+        extract_stats = None
+        provision_stats = None
+        template_dir = _template_dir_for(target_url) if use_store else None
+        verify = _settings.get("provision_mode", DEFAULT_PROVISION_MODE) == "hardlink"
+
+        if use_store and not extracted and _acquire_template(template_dir, verify=verify):
+            pinned_template = template_dir
+            mode = "template"
+            print(f"🧬 [{job_id}] Template already unpacked: {template_dir}")
+        else:
+            mode = "stream" if extracted else "file"
+            if not extracted:
+                reporter.stage("extract", "Распаковка архива...")
+                try:
+                    with _span("extract", job_id=job_id) as span:
+                        extract_stats = _extract_archive(job_id, zip_path, staging_dir or target_dir)
+                        span.update(files=extract_stats["files"], bytes=extract_stats["bytes"])
+                except zipfile.BadZipFile:
+                    # Битый архив в кэше не оставляем, иначе он будет отдаваться снова
+                    _cache_drop(target_url)
+                    return {"status": "error", "msg": "Ошибка: Скачанный файл поврежден (Bad Zip)."}
+            if use_store:
+                template_dir = _finalize_template(staging_dir, template_dir)
+                if template_dir != staging_dir:
+                    pinned_template = template_dir
+
+        if use_store:
+            reporter.stage("provision", "Копируем шаблон ученику...")
+            with _span("provision", job_id=job_id) as span:
+                provision_stats = _provision_from_template(job_id, template_dir, target_dir)
+                span.update(files=provision_stats["files"], mode=provision_stats["mode"])
 
-                    if downloaded_size % (1024 * 512) == 0:
-                        eel.update_ui_progress(project_index, percent, f"Загрузка: {percent}%")
-                        eel.sleep(0.001)
+        # --- СТАДИЯ 3: ЧИСТКА ---
+        # Архив остается в кэше (его размер ограничен cache_max_mb)
+
+        reporter.stage("cleanup", "Обновляем список проектов...")
+        with _span("cleanup", job_id=job_id):
+            cache_entry = _cache_get(target_url)
+            _index_record_install(course_id, target_dir, target_url,
+                                  cache_entry.get("etag") if cache_entry else None)
+            _write_install_manifest(zip_path, target_dir)
+
+        elapsed = round(time.perf_counter() - started, 3)
+        _record_span("install", elapsed, job_id=job_id, mode=mode)
+        print(f"⏱️ [{job_id}] Installed in {elapsed}s ({mode})")
+        reporter.stage("done", "Готово!")
+        return {"status": "success", "path": target_dir, "mode": mode, "elapsed": elapsed,
+                "extract": extract_stats, "provision": provision_stats,
+                "timings": dict(reporter.timings)}
+
+    except DownloadCancelled:
+        raise
+    except IntegrityError as e:
+        print(f"❌ [{job_id}] Integrity check failed: {e}")
+        return {"status": "error", "msg": f"Архив не совпадает с data.json ({e})"}
+    except Exception as e:
+        print(f"Download Error: {e}")
+        return {"status": "error", "msg": str(e)}
+    finally:
+        if zip_path:
+            _cache_unpin(zip_path)  # Архив больше не нужен этой задаче — LRU может его выселить
+        if pinned_template:
+            _release_template(pinned_template)
+        if staging_dir and os.path.exists(staging_dir):
+            shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+# --- ОБНОВЛЕНИЕ ПРОЕКТА ДО СВЕЖЕГО ШАБЛОНА ---
+# При установке запоминаем манифест: для каждого файла размер и CRC32 из
+# central directory архива плюс mtime файла на диске. При обновлении сверяем
+# новый архив с файлами ученика и пишем только новые и изменившиеся файлы.
+# Файл, который ученик правил (не совпадает с манифестом) или удалил, не
+# трогаем — он попадает в conflicts. Файлы, удаленные из шаблона, только
+# перечисляем. Файлы заменяются через временный файл и os.replace.
+
+def _manifest_path(project_dir):
+    folder = os.path.join(_get_app_data_dir(), "manifests")
+    os.makedirs(folder, exist_ok=True)
+    key = hashlib.sha1(os.path.abspath(project_dir).encode('utf-8')).hexdigest()
+    return os.path.join(folder, key + ".json")
+
+
+def _load_install_manifest(project_dir):
+    """{относительный путь: [размер, crc32, mtime_ns]} или None, если манифеста нет."""
+    try:
+        with open(_manifest_path(project_dir), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-        # --- СТАДИЯ 2: РАСПАКОВКА ---
-        eel.update_ui_progress(project_index, 95, "Распаковка архива...")
 
-        try:
-            with zipfile.ZipFile(temp_zip_path, 'r') as z:
-                # GitHub кладет всё в папку "repo-name-main", нам надо вытащить содержимое
-                root_folder_inside_zip = z.namelist()[0]
+def _save_install_manifest(project_dir, manifest):
+    _atomic_write_json(_manifest_path(project_dir), manifest)
 
-                # Получаем список всех файлов
-                all_files = z.namelist()
-                total_files = len(all_files)
 
-                for i, file in enumerate(all_files):
-                    # Пропускаем саму корневую папку
-                    if file == root_folder_inside_zip:
-                        continue
+def _archive_members(zip_file):
+    """{относительный путь: ZipInfo} файлов архива (по тем же правилам, что и распаковка)."""
+    names = zip_file.namelist()
+    if not names:
+        return {}
+    root = names[0]
+    members = {}
+    for info in zip_file.infolist():
+        rel_path = _member_rel_path(info.filename, root)
+        if rel_path is not None and not info.is_dir():
+            members[rel_path] = info
+    return members
 
-                    # Убираем корневую папку из пути (strip root folder)
-                    # Пример: "game-main/Assets/Script.cs" -> "Assets/Script.cs"
-                    rel_path = file[len(root_folder_inside_zip):]
 
-                    # Пропускаем пустые пути и MACOSX мусор
-                    if not rel_path or rel_path.startswith("__MACOSX") or rel_path.startswith("."):
-                        continue
+def _write_install_manifest(zip_path, project_dir):
+    """Манифест после установки: CRC берем из архива, mtime — с диска."""
+    import zipfile
 
-                    dest_path = os.path.join(target_dir, rel_path)
+    manifest = {}
+    with zipfile.ZipFile(zip_path, 'r') as z:
+        for rel_path, info in _archive_members(z).items():
+            try:
+                st = os.stat(os.path.join(project_dir, rel_path))
+            except OSError:
+                continue
+            manifest[rel_path] = [info.file_size, info.CRC, st.st_mtime_ns]
+    _save_install_manifest(project_dir, manifest)
 
-                    # Распаковка
-                    if file.endswith('/'):
-                        os.makedirs(dest_path, exist_ok=True)
-                    else:
-                        os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                        with open(dest_path, "wb") as f_out:
-                            f_out.write(z.read(file))
 
-        except zipfile.BadZipFile:
-            return {"status": "error", "msg": "Ошибка: Скачанный файл поврежден (Bad Zip)."}
+def _file_crc32(path):
+    crc = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(EXTRACT_CHUNK_SIZE), b''):
+            crc = zlib.crc32(chunk, crc)
+    return crc
 
-        # --- СТАДИЯ 3: ЧИСТКА ---
-        # Удаляем zip архив, чтобы не занимать место
-        if os.path.exists(temp_zip_path):
-            os.remove(temp_zip_path)
 
-        eel.update_ui_progress(project_index, 100, "Готово!")
-        return {"status": "success", "path": target_dir}
+def _replace_with_member(z, info, dest_path, job_id):
+    """
+    Пишет файл из архива во временный файл рядом и подменяет им dest_path
+    (os.replace атомарен). Старый файл не перезаписывается на месте, поэтому
+    hardlink на шаблон и копии других учеников не меняются, а прерванное
+    обновление не оставляет полфайла.
+    """
+    tmp_path = f"{dest_path}.{job_id}.tmp"
+    try:
+        with z.open(info) as src, open(tmp_path, "wb") as f_out:
+            shutil.copyfileobj(src, f_out, EXTRACT_CHUNK_SIZE)
+        _replace_file(tmp_path, dest_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _update_installed(job_id, course_id, project_name, student_name):
+    """Обновляет установленный проект: пишет только новые и изменившиеся файлы."""
+    import zipfile
+
+    course = _catalog.get_course(course_id)
+    project = _catalog.get_project(course_id, project_name)
+    if not project and course:
+        # Frontend знает только имя папки — оно может отличаться от названия шаблона
+        for proj in course.get('projects', []):
+            if sanitize_filename(proj['name']) == project_name:
+                project = proj
+                break
+    if not project:
+        return {"status": "error", "msg": "GitHub URL not found!"}
+    target_url = project['github_url']
 
-    except Exception as e:
-        print(f"Download Error: {e}")
-        # Пытаемся почистить мусор при ошибке
-        if os.path.exists(temp_zip_path):
-            os.remove(temp_zip_path)
-        return {"status": "error", "msg": str(e)}
+    target_dir = os.path.join(_get_base_path(), "DigisCool", sanitize_filename(course_id),
+                              sanitize_filename(student_name), sanitize_filename(project['name']))
+    if not os.path.isdir(target_dir):
+        return {"status": "error", "msg": "Проект не установлен"}
 
+    reporter = _get_reporter(job_id)
+    try:
+        zip_path, _ = _fetch_archive(job_id, target_url,
+                                     sha256=project.get('sha256'), size=project.get('size'))
+    except IntegrityError as e:
+        return {"status": "error", "msg": f"Архив не совпадает с data.json ({e})"}
+    reporter.stage("extract", "Сверяем файлы...")
 
-@eel.expose
-def get_courses():
+    baseline = _load_install_manifest(target_dir) or {}
+    manifest = {}
+    report = {"added": [], "updated": [], "conflicts": [], "removed_upstream": [], "unchanged": 0}
+
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as z:
+            members = _archive_members(z)
+            for done, (rel_path, info) in enumerate(members.items(), 1):
+                _check_cancelled(job_id)
+                reporter.items(done, len(members))
+                dest_path = os.path.join(target_dir, rel_path)
+                base = baseline.get(rel_path)
+
+                try:
+                    st = os.stat(dest_path)
+                except OSError:
+                    st = None
+
+                if st is None and base:
+                    # Файл был в установленной версии, а ученик его удалил — не возвращаем
+                    report["conflicts"].append(rel_path)
+                    manifest[rel_path] = base
+                    continue
+                if st is None:
+                    action = "added"
+                else:
+                    # Размер и mtime совпали с манифестом — файл не трогали, CRC известен
+                    untouched = bool(base) and st.st_size == base[0] and st.st_mtime_ns == base[2]
+                    if untouched:
+                        local_crc = base[1]
+                    elif st.st_size == info.file_size or (base and st.st_size == base[0]):
+                        local_crc = _file_crc32(dest_path)
+                    else:
+                        local_crc = None
+
+                    if st.st_size == info.file_size and local_crc == info.CRC:
+                        report["unchanged"] += 1
+                        manifest[rel_path] = [info.file_size, info.CRC, st.st_mtime_ns]
+                        continue
+                    if untouched or (base and st.st_size == base[0] and local_crc == base[1]):
+                        action = "updated"
+                    else:
+                        # Ученик менял файл — не перезаписываем
+                        report["conflicts"].append(rel_path)
+                        if base:
+                            manifest[rel_path] = base
+                        continue
+
+                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+                try:
+                    _replace_with_member(z, info, dest_path, job_id)
+                except PermissionError as e:
+                    # Файл занят (открыт в редакторе) — оставляем как есть
+                    print(f"⚠️ [{job_id}] Cannot replace {rel_path}: {e}")
+                    report["conflicts"].append(rel_path)
+                    if base:
+                        manifest[rel_path] = base
+                    continue
+                manifest[rel_path] = [info.file_size, info.CRC, os.stat(dest_path).st_mtime_ns]
+                report[action].append(rel_path)
+    except zipfile.BadZipFile:
+        _cache_drop(target_url)
+        return {"status": "error", "msg": "Ошибка: Скачанный файл поврежден (Bad Zip)."}
+    finally:
+        _cache_unpin(zip_path)
+
+    report["removed_upstream"] = sorted(set(baseline) - set(members))
+
+    reporter.stage("cleanup", "Обновляем список проектов...")
+    _save_install_manifest(target_dir, manifest)
+    cache_entry = _cache_get(target_url)
+    _index_record_install(course_id, target_dir, target_url,
+                          cache_entry.get("etag") if cache_entry else None)
+
+    print(f"🔄 [{job_id}] Update: +{len(report['added'])} ~{len(report['updated'])} "
+          f"={report['unchanged']} conflicts={len(report['conflicts'])} "
+          f"removed upstream={len(report['removed_upstream'])}")
+    reporter.stage("done", "Готово!")
+    return dict(report, status="success", path=target_dir, timings=dict(reporter.timings))
+
+
+# --- ПОТОКОВАЯ РАСПАКОВКА (STREAM EXTRACT) ---
+# Zip можно читать с начала: перед каждым файлом идет local file header
+# с именем и размерами. Поэтому файлы пишутся в target_dir, пока архив еще качается:
+# один поток читает сеть и пишет архив в кэш, второй разбирает те же байты.
+# Если архив устроен так, что без central directory (конец файла) его не разобрать
+# (stored + data descriptor, zip64, шифрование), докачиваем файл и распаковываем
+# обычным способом.
+
+_LOCAL_HEADER = struct.Struct('<4sHHHHHIIIHH')
+_LOCAL_HEADER_SIG = b'PK\x03\x04'
+_CENTRAL_DIR_SIGS = (b'PK\x01\x02', b'PK\x05\x06', b'PK\x06\x06')
+_DATA_DESCRIPTOR_SIG = b'PK\x07\x08'
+_STREAM_QUEUE_CHUNKS = 64  # Сколько чанков по 64 КБ может ждать распаковщика (~4 МБ)
+
+
+class _StreamFallback(Exception):
+    """Архив нельзя распаковать из потока — нужен файл целиком."""
+
+
+class _ChunkReader:
+    """Читает байты из очереди чанков, которую наполняет сетевой поток."""
+
+    def __init__(self, job_id, chunks):
+        self.job_id = job_id
+        self.chunks = chunks
+        self.buffer = bytearray()
+        self.finished = False
+        self.wait_time = 0.0  # Сколько распаковщик простаивал в ожидании сети
+
+    def _pull(self):
+        """Берет следующий чанк. False — поток закончился."""
+        if self.finished:
+            return False
+        _check_cancelled(self.job_id)
+        waited = time.perf_counter()
+        item = self.chunks.get()
+        self.wait_time += time.perf_counter() - waited
+        if item is None:
+            self.finished = True
+            return False
+        if isinstance(item, BaseException):
+            self.finished = True
+            raise item
+        self.buffer += item
+        return True
+
+    def read(self, size):
+        """Ровно size байт (или _StreamFallback, если поток оборвался)."""
+        while len(self.buffer) < size:
+            if not self._pull():
+                raise _StreamFallback("Unexpected end of stream")
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def read_some(self, limit):
+        """Сколько есть в буфере (до limit), но не меньше 1 байта."""
+        if not self.buffer and not self._pull():
+            raise _StreamFallback("Unexpected end of stream")
+        data = bytes(self.buffer[:limit])
+        del self.buffer[:limit]
+        return data
+
+    def unread(self, data):
+        self.buffer[:0] = data
+
+    def drain(self):
+        """Дочитывает очередь до конца (сеть при этом дописывает архив в файл)."""
+        self.buffer.clear()
+        while self._pull():
+            self.buffer.clear()
+
+
+def _download_with_stream_extract(job_id, response, f, total_length, target_dir,
+                                  hasher=None, expected_size=None):
     """
-    Read fail data.json and return list of courses.
+    Сеть -> файл в кэше (фоновый поток) и одновременно сеть -> target_dir (этот поток).
+    Возвращает (скачано_байт, распаковано_ли).
     """
+    chunks = queue.Queue(maxsize=_STREAM_QUEUE_CHUNKS)
+    result = {"downloaded": 0, "network_time": 0.0}
+    stop = threading.Event()
+
+    def put(item):
+        # Если распаковщик упал и больше не читает — прекращаем качать
+        while True:
+            if stop.is_set():
+                raise DownloadCancelled()
+            try:
+                chunks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def network_worker():
+        started = time.perf_counter()
+        try:
+            result["downloaded"] = _write_response(job_id, response, f, 0, total_length, on_chunk=put,
+                                                   hasher=hasher, expected_size=expected_size)
+            put(None)
+        except BaseException as e:
+            try:
+                put(e)
+            except DownloadCancelled:
+                pass
+        finally:
+            result["network_time"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    worker = threading.Thread(target=network_worker, name=f"net-{job_id}", daemon=True)
+    worker.start()
+
+    reader = _ChunkReader(job_id, chunks)
+    extracted = False
     try:
-        # Open file data.json and read it. encoding='utf-8' is important!
-        with open('data.json', 'r', encoding='utf-8') as file:
-            data = json.load(file)
-            # return list of courses
-            return data
+        try:
+            files = _extract_zip_stream(job_id, reader, target_dir)
+            extracted = True
+            print(f"🌊 [{job_id}] Stream-extracted {files} files")
+        except (_StreamFallback, zlib.error, UnicodeDecodeError) as e:
+            print(f"↩️ [{job_id}] Stream extract not possible ({e}), falling back to file")
+        reader.drain()
+    except BaseException:
+        stop.set()
+        raise
+    finally:
+        worker.join()
+
+    # Оценка выигрыша: последовательный путь = сеть + работа распаковщика
+    wall = time.perf_counter() - started
+    extract_busy = wall - reader.wait_time
+    if extracted:
+        saved = result["network_time"] + extract_busy - wall
+        print(f"⏱️ [{job_id}] Pipelined {wall:.2f}s vs ~{wall + saved:.2f}s sequential "
+              f"(saved ~{saved:.2f}s)")
+    return result["downloaded"], extracted
+
+
+def _extract_zip_stream(job_id, reader, target_dir):
+    """Разбирает local file headers из потока и пишет файлы. Возвращает число файлов."""
+    import zipfile
+
+    root = None
+    files = 0
+    made_dirs = set()
+
+    while True:
+        signature = reader.read(4)
+        if signature in _CENTRAL_DIR_SIGS:
+            if root is None:
+                raise _StreamFallback("Empty archive")
+            return files
+        if signature != _LOCAL_HEADER_SIG:
+            raise _StreamFallback("Unexpected record")
+
+        header = _LOCAL_HEADER.unpack(signature + reader.read(_LOCAL_HEADER.size - 4))
+        _, _, flags, method, _, _, crc, comp_size, size, name_len, extra_len = header
+        raw_name = reader.read(name_len)
+        extra = reader.read(extra_len)
+
+        if flags & 0x1:
+            raise _StreamFallback("Encrypted member")
+        if method not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+            raise _StreamFallback(f"Compression method {method}")
+        if 0xFFFFFFFF in (comp_size, size) or _has_zip64_extra(extra):
+            raise _StreamFallback("Zip64 member")
+        has_descriptor = bool(flags & 0x8)
+        if has_descriptor and method == zipfile.ZIP_STORED:
+            raise _StreamFallback("Stored member with data descriptor")
+
+        name = raw_name.decode('utf-8' if flags & 0x800 else 'cp437')
+        if root is None:
+            root = name
+        rel_path = _member_rel_path(name, root)
+
+        dest = None
+        if rel_path is not None:
+            dest_path = os.path.join(target_dir, rel_path)
+            if name.endswith('/'):
+                _makedirs_once(dest_path, made_dirs)
+            else:
+                _makedirs_once(os.path.dirname(dest_path), made_dirs)
+                _unlink_shared(dest_path)
+                dest = open(dest_path, 'wb')
 
-    except FileNotFoundError:
-        print("Error: File not found!")
-        return []
-    except json.JSONDecodeError as e:
-        print(f"Error wrong JSON format: {e}")
-        return []
+        try:
+            actual_crc = _copy_stream_member(reader, dest, method, comp_size, has_descriptor)
+        finally:
+            if dest:
+                dest.close()
+
+        if has_descriptor:
+            crc = _read_data_descriptor(reader)
+        if actual_crc != crc:
+            raise _StreamFallback(f"CRC mismatch in {name}")
+        if dest:
+            files += 1
+
+
+def _has_zip64_extra(extra):
+    """Есть ли в extra-поле запись zip64 (id 0x0001)."""
+    pos = 0
+    while pos + 4 <= len(extra):
+        header_id, length = struct.unpack_from('<HH', extra, pos)
+        if header_id == 0x0001:
+            return True
+        pos += 4 + length
+    return False
+
+
+def _copy_stream_member(reader, dest, method, comp_size, has_descriptor):
+    """Распаковывает один файл из потока в dest (или пропускает). Возвращает CRC32."""
+    import zipfile
+
+    chunk_size = 1024 * 64
+    crc = 0
+    decompressor = zlib.decompressobj(-15) if method == zipfile.ZIP_DEFLATED else None
+
+    if has_descriptor:
+        # Размер заранее неизвестен: deflate сам знает, где кончается
+        while not decompressor.eof:
+            data = decompressor.decompress(reader.read_some(chunk_size))
+            crc = zlib.crc32(data, crc)
+            if dest:
+                dest.write(data)
+        reader.unread(decompressor.unused_data)
+        return crc
+
+    remaining = comp_size
+    while remaining > 0:
+        raw = reader.read(min(chunk_size, remaining))
+        remaining -= len(raw)
+        data = decompressor.decompress(raw) if decompressor else raw
+        crc = zlib.crc32(data, crc)
+        if dest:
+            dest.write(data)
+    if decompressor:
+        data = decompressor.flush()
+        crc = zlib.crc32(data, crc)
+        if dest:
+            dest.write(data)
+    return crc
+
+
+def _read_data_descriptor(reader):
+    """Читает data descriptor после файла (сигнатура необязательна). Возвращает CRC."""
+    first = reader.read(4)
+    if first == _DATA_DESCRIPTOR_SIG:
+        first = reader.read(4)
+    reader.read(8)  # compressed size + size
+    return struct.unpack('<I', first)[0]
+
+
+def _makedirs_once(path, made_dirs):
+    """os.makedirs, но каждую папку создаем только один раз."""
+    if path and path not in made_dirs:
+        os.makedirs(path, exist_ok=True)
+        made_dirs.add(path)
 
 
 def sanitize_filename(name):
@@ -412,48 +2853,399 @@ def ensure_project_folder(base_path, course_name, student_name, project_name):
         return {"status": "error", "msg": str(e)}
 
 
+# --- ИНДЕКС УСТАНОВЛЕННЫХ ПРОЕКТОВ ---
+# Вместо обхода папок на каждый вызов держим индекс в памяти и на диске
+# (~/.digiscool/installed_index.json). Обновляется он инкрементально:
+# папку ученика перечитываем, только если изменился ее mtime (добавили или
+# удалили проект), размер проекта пересчитываем, только если изменился mtime
+# папки проекта. Вызов из окна делает только эти stat и отвечает из памяти.
+# Правки глубже в дереве mtime папки проекта не меняют, поэтому записи старше
+# installed_rescan_seconds пересчитываются в фоне, по INSTALLED_RESCAN_BATCH за раз.
+# Установка через лаунчер сразу записывает проект в индекс.
+# Если установлен пакет watchdog и включен watch_installed, изменения на диске
+# помечают курс для полного пересканирования.
+
+_installed_index = None  # путь курса -> {"mtime", "students": {имя: {"mtime", "projects": {...}}}}
+_installed_lock = threading.RLock()
+_installed_dirty = set()  # курсы, которые надо пересканировать целиком (от watcher)
+_installed_watcher = None
+DEFAULT_INSTALLED_RESCAN_SECONDS = 600
+INSTALLED_RESCAN_BATCH = 20  # Сколько проектов пересчитывает один фоновый проход
+_installed_rescans = set()  # курсы, для которых сейчас идет фоновый пересчет
+
+
+def _installed_index_path():
+    return os.path.join(_get_app_data_dir(), "installed_index.json")
+
+
+def _load_installed_index_locked():
+    global _installed_index
+    if _installed_index is None:
+        _installed_index = {}
+        try:
+            with open(_installed_index_path(), 'r', encoding='utf-8') as f:
+                _installed_index = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Installed index is broken, rebuilding: {e}")
+    return _installed_index
+
+
+def _save_installed_index_locked():
+    _atomic_write_json(_installed_index_path(), _installed_index)
+
+
+def _scan_tree(path):
+    """Размер, число файлов и последний mtime внутри папки (через os.scandir)."""
+    size = 0
+    files = 0
+    latest = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            st = entry.stat(follow_symlinks=False)
+                            size += st.st_size
+                            files += 1
+                            latest = max(latest, st.st_mtime)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+    return size, files, latest
+
+
+def _scan_project(project_path, mtime_ns, previous=None):
+    """Запись индекса для папки проекта (источник сохраняем из старой записи)."""
+    size, files, latest = _scan_tree(project_path)
+    previous = previous or {}
+    return {
+        "mtime": mtime_ns,
+        "size": size,
+        "files": files,
+        "last_modified": latest or mtime_ns / 1e9,
+        "source_url": previous.get("source_url"),
+        "etag": previous.get("etag"),
+        "scanned": time.time(),
+    }
+
+
+def _list_subdirs(path):
+    """{имя: mtime_ns} для подпапок."""
+    result = {}
+    with os.scandir(path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    result[entry.name] = entry.stat().st_mtime_ns
+            except OSError:
+                continue
+    return result
+
+
+def _refresh_course_locked(course_path, cancel=None):
+    """Инкрементально обновляет индекс курса. Возвращает True, если что-то изменилось."""
+    index = _load_installed_index_locked()
+    try:
+        course_mtime = os.stat(course_path).st_mtime_ns
+    except OSError:
+        return index.pop(course_path, None) is not None
+
+    force = course_path in _installed_dirty
+    _installed_dirty.discard(course_path)
+
+    course = index.get(course_path)
+    if course is None or force:
+        course = {"mtime": None, "students": {} if course is None else course["students"]}
+        index[course_path] = course
+    changed = False
+
+    # Список учеников перечитываем, только если папка курса изменилась
+    if course["mtime"] != course_mtime:
+        students_now = _list_subdirs(course_path)
+        for name in list(course["students"]):
+            if name not in students_now:
+                del course["students"][name]
+        for name in students_now:
+            course["students"].setdefault(name, {"mtime": None, "projects": {}})
+        course["mtime"] = course_mtime
+        changed = True
+
+    for student_name, student in course["students"].items():
+        _check_task_cancelled(cancel)
+        student_path = os.path.join(course_path, student_name)
+        try:
+            student_mtime = os.stat(student_path).st_mtime_ns
+        except OSError:
+            continue
+        projects = student["projects"]
+
+        if student["mtime"] != student_mtime or force:
+            # Папка ученика изменилась: проекты добавили или удалили
+            projects_now = _list_subdirs(student_path)
+            for name in list(projects):
+                if name not in projects_now:
+                    del projects[name]
+            student["mtime"] = student_mtime
+            changed = True
+        else:
+            projects_now = {}
+            for name in list(projects):
+                try:
+                    projects_now[name] = os.stat(os.path.join(student_path, name)).st_mtime_ns
+                except OSError:
+                    del projects[name]
+                    changed = True
+
+        # Каждый проект сверяем со своей записью, даже если папка ученика не менялась
+        for name, project_mtime in projects_now.items():
+            _check_task_cancelled(cancel)
+            previous = projects.get(name)
+            if previous is None or previous["mtime"] != project_mtime or force:
+                projects[name] = _scan_project(os.path.join(student_path, name),
+                                               project_mtime, previous)
+                changed = True
+
+    return changed
+
+
+def _schedule_installed_rescan_locked(course_path):
+    """
+    Ставит в фон пересчет самых давно просканированных проектов курса
+    (не больше INSTALLED_RESCAN_BATCH за проход, один проход на курс).
+    """
+    rescan_after = _config_number("installed_rescan_seconds", DEFAULT_INSTALLED_RESCAN_SECONDS)
+    course = _load_installed_index_locked().get(course_path)
+    if rescan_after <= 0 or not course or course_path in _installed_rescans:
+        return
+    now = time.time()
+    stale = sorted((info.get("scanned", 0), student_name, name)
+                   for student_name, student in course["students"].items()
+                   for name, info in student["projects"].items()
+                   if now - info.get("scanned", 0) > rescan_after)[:INSTALLED_RESCAN_BATCH]
+    if not stale:
+        return
+    _installed_rescans.add(course_path)
+    _get_task_executor().submit(_rescan_installed, course_path,
+                                [(student_name, name) for _, student_name, name in stale])
+
+
+def _rescan_installed(course_path, projects):
+    """Фоновый пересчет: дерево обходим без замка, в индекс пишем под ним."""
+    try:
+        started = time.time()
+        scanned = {}
+        for student_name, name in projects:
+            project_path = os.path.join(course_path, student_name, name)
+            try:
+                mtime = os.stat(project_path).st_mtime_ns
+            except OSError:
+                continue  # Удален — уберет обычное обновление
+            scanned[(student_name, name)] = _scan_project(project_path, mtime)
+
+        with _installed_lock:
+            course = _load_installed_index_locked().get(course_path)
+            if not course:
+                return
+            for (student_name, name), entry in scanned.items():
+                student = course["students"].get(student_name)
+                previous = student["projects"].get(name) if student else None
+                if previous is None or previous.get("scanned", 0) > started:
+                    continue  # Запись удалили или уже пересчитали свежее
+                entry.update(source_url=previous.get("source_url"), etag=previous.get("etag"))
+                student["projects"][name] = entry
+            _save_installed_index_locked()
+    except Exception as e:
+        print(f"Error rescanning projects: {e}")
+    finally:
+        with _installed_lock:
+            _installed_rescans.discard(course_path)
+
+
+def _get_course_path(course_id):
+    return os.path.abspath(os.path.join(_get_base_path(), "DigisCool", sanitize_filename(course_id)))
+
+
+def _index_record_install(course_id, project_path, source_url, etag):
+    """Записывает в индекс проект, который только что установил лаунчер."""
+    course_path = _get_course_path(course_id)
+    project_path = os.path.abspath(project_path)
+    student_path, project_name = os.path.split(project_path)
+    student_name = os.path.basename(student_path)
+
+    with _installed_lock:
+        _refresh_course_locked(course_path)
+        course = _load_installed_index_locked().get(course_path)
+        if course is None:
+            return
+        student = course["students"].setdefault(student_name, {"mtime": None, "projects": {}})
+        try:
+            mtime = os.stat(project_path).st_mtime_ns
+        except OSError:
+            return
+        student["projects"][project_name] = _scan_project(
+            project_path, mtime, {"source_url": source_url, "etag": etag})
+        _save_installed_index_locked()
+
+
+def _start_installed_watcher():
+    """Необязательный watcher (пакет watchdog): изменения на диске помечают курс грязным."""
+    global _installed_watcher
+    if _installed_watcher is not None or not _settings.get("watch_installed", False):
+        return
+    try:
+        from watchdog.observers import Observer
+        from watchdog.events import FileSystemEventHandler
+    except ImportError:
+        print("watchdog is not installed, installed projects are refreshed by mtime only")
+        return
+
+    root = os.path.abspath(os.path.join(_get_base_path(), "DigisCool"))
+    if not os.path.isdir(root):
+        return
+
+    class _Handler(FileSystemEventHandler):
+        def on_any_event(self, event):
+            rel = os.path.relpath(os.path.abspath(event.src_path), root)
+            course = rel.split(os.sep)[0]
+            if course and course not in (".", ".."):
+                with _installed_lock:
+                    _installed_dirty.add(os.path.join(root, course))
+
+    observer = Observer()
+    observer.schedule(_Handler(), root, recursive=True)
+    observer.daemon = True
+    observer.start()
+    _installed_watcher = observer
+
+
 # main.py
 
 @eel.expose
 def get_installed_projects(course_id):
     """
-    Сканирует папку установки и возвращает список найденных проектов для конкретного курса.
+    Возвращает список установленных проектов курса из индекса (обновляется инкрементально).
     Структура: base_path / DigisCool / course_id / student_name / project_name
     """
-    config = _load_config()
-    base_path = config.get("download_path") or _get_default_download_path()
+    return _run_blocking(_get_installed_projects_sync, course_id)
 
-    # Путь к папке курса
-    course_path = os.path.join(base_path, "DigisCool", sanitize_filename(course_id))
 
-    found_projects = []
+def _get_installed_projects_sync(course_id, cancel=None):
+    course_path = _get_course_path(course_id)
+    with _installed_lock:
+        _refresh_installed_locked(course_path, cancel)
+        return [_installed_item(course_id, course_path, student_name, project_name, info)
+                for student_name, project_name, info in _installed_entries_locked(course_path)]
 
-    if os.path.exists(course_path):
-        # Проходимся по всем студентам внутри курса
-        try:
-            students = os.listdir(course_path)
-            for student in students:
-                student_path = os.path.join(course_path, student)
-                if os.path.isdir(student_path):
-                    # Проходимся по проектам студента
-                    projects = os.listdir(student_path)
-                    for proj in projects:
-                        # Добавляем в список (можно добавить проверку на наличие файлов внутри)
-                        found_projects.append({
-                            "name": proj,
-                            "student": student,
-                            "path": os.path.join(student_path, proj),
-                            "course_id": course_id
-                        })
-        except Exception as e:
-            print(f"Error scanning projects: {e}")
 
-    return found_projects
+INSTALLED_SORTS = {
+    # ключ сортировки -> (функция ключа по (ученик, проект, info), по убыванию)
+    "last_modified": (lambda entry: entry[2]["last_modified"], True),
+    "student": (lambda entry: (entry[0].casefold(), entry[1].casefold()), False),
+    "name": (lambda entry: (entry[1].casefold(), entry[0].casefold()), False),
+}
+DEFAULT_INSTALLED_PAGE_SIZE = 50
+INSTALLED_SNAPSHOTS = 8  # Сколько отсортированных списков держим для прокрутки
+
+_installed_snapshots = collections.OrderedDict()  # токен -> ((курс, поиск, сортировка), [(ученик, проект, info)])
+
+
+@eel.expose
+def get_installed_page(course_id, offset=0, limit=DEFAULT_INSTALLED_PAGE_SIZE, search="",
+                       sort="last_modified", snapshot=None):
+    """
+    Одна страница установленных проектов: поиск по имени ученика или проекта,
+    сортировка (по умолчанию — сначала недавно измененные).
+    Возвращает {"items", "total", "offset", "limit", "snapshot"}; total — сколько
+    найдено всего. Следующие страницы запрашиваются с тем же snapshot: они
+    берутся из того же списка, даже если индекс за это время изменился. Если в
+    ответе пришел другой snapshot (старый забыт), список надо загрузить заново.
+    """
+    return _run_blocking(_get_installed_page_sync, course_id, offset, limit, search, sort, snapshot)
+
+
+def _get_installed_page_sync(course_id, offset=0, limit=DEFAULT_INSTALLED_PAGE_SIZE, search="",
+                             sort="last_modified", snapshot=None, cancel=None):
+    if sort not in INSTALLED_SORTS:
+        return {"status": "error", "msg": f"Unknown sort: {sort}"}
+    offset = max(0, int(offset))
+    limit = max(1, int(limit))
+    query = (search or "").strip().casefold()
+
+    course_path = _get_course_path(course_id)
+    with _installed_lock:
+        stored = _installed_snapshots.get(snapshot)
+        if stored and stored[0] == (course_path, query, sort):
+            _installed_snapshots.move_to_end(snapshot)
+            entries = stored[1]
+        else:
+            # Новый список: обновляем индекс и запоминаем отсортированный снимок
+            _refresh_installed_locked(course_path, cancel)
+            entries = [entry for entry in _installed_entries_locked(course_path)
+                       if not query or query in entry[0].casefold() or query in entry[1].casefold()]
+            key, reverse = INSTALLED_SORTS[sort]
+            entries.sort(key=key, reverse=reverse)
+            snapshot = uuid.uuid4().hex[:12]
+            _installed_snapshots[snapshot] = ((course_path, query, sort), entries)
+            while len(_installed_snapshots) > INSTALLED_SNAPSHOTS:
+                _installed_snapshots.popitem(last=False)
+        # Словари строим только для отдаваемой страницы
+        items = [_installed_item(course_id, course_path, *entry)
+                 for entry in entries[offset:offset + limit]]
+
+    return {"items": items, "total": len(entries), "offset": offset, "limit": limit,
+            "snapshot": snapshot}
+
+
+def _refresh_installed_locked(course_path, cancel=None):
+    """Досканирует изменения курса и сохраняет индекс (вызывать под _installed_lock)."""
+    try:
+        if _refresh_course_locked(course_path, cancel):
+            _save_installed_index_locked()
+        _schedule_installed_rescan_locked(course_path)
+    except TaskCancelled:
+        # То, что успели просканировать, не теряем
+        _save_installed_index_locked()
+        raise
+    except Exception as e:
+        print(f"Error scanning projects: {e}")
+
+
+def _installed_entries_locked(course_path):
+    """(ученик, проект, info) из индекса курса."""
+    course = _load_installed_index_locked().get(course_path)
+    if not course:
+        return []
+    return [(student_name, project_name, info)
+            for student_name, student in course["students"].items()
+            for project_name, info in student["projects"].items()]
+
+
+def _installed_item(course_id, course_path, student_name, project_name, info):
+    return {
+        "name": project_name,
+        "student": student_name,
+        "path": os.path.join(course_path, student_name, project_name),
+        "course_id": course_id,
+        "size": info["size"],
+        "files": info["files"],
+        "last_modified": info["last_modified"],
+        "source_url": info["source_url"],
+        "etag": info["etag"],
+    }
 
 
 @eel.expose
 def open_folder(path):
     """Открывает папку в проводнике (Explorer/Finder)"""
+    import subprocess
+
     if sys.platform == "win32":
         os.startfile(path)
     elif sys.platform == "darwin":
@@ -464,6 +3256,8 @@ def open_folder(path):
 
 @eel.expose
 def launch_editor(path, editor_type):
+    import subprocess
+
     # Нормализуем путь (меняем слеши на системные)
     clean_path = os.path.normpath(path)
     print(f"🚀 Launching {editor_type} for: {clean_path}")
@@ -510,6 +3304,125 @@ def launch_editor(path, editor_type):
         return {"status": "error", "msg": str(e)}
 
 
+# --- КОНСОЛЬНЫЙ РЕЖИМ (CLI) ---
+# Подготовка класса перед уроком одной командой, без окна:
+#   python main.py provision roster.csv [--workers 6] [--update]
+# В roster.csv строки "course_id,student,project" (заголовок необязателен).
+# Используются те же каталог, папки и очередь загрузок, что и в окне.
+
+def _read_roster(path):
+    """Строки (course_id, student, project). Пустые строки и # комментарии пропускаем."""
+    rows = []
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        for line_no, row in enumerate(csv.reader(f), 1):
+            row = [cell.strip() for cell in row]
+            if not any(row) or row[0].startswith('#'):
+                continue
+            if line_no == 1 and row[0].lower() in ("course_id", "course"):
+                continue  # Заголовок
+            if len(row) < 3:
+                raise ValueError(f"{path}:{line_no}: expected course_id,student,project")
+            rows.append((row[0], row[1], row[2]))
+    return rows
+
+
+def _provision_roster(roster_path, workers=None, update=False):
+    """Ставит все строки ростера в очередь, печатает результаты и сводку. Возвращает код выхода."""
+    try:
+        rows = _read_roster(roster_path)
+    except (OSError, ValueError) as e:
+        print(f"❌ Cannot read roster: {e}")
+        return 2
+
+    if workers is not None:
+        if workers < 1:
+            print(f"❌ --workers must be at least 1, got {workers}")
+            return 2
+        _set_download_workers(workers)
+
+    print(f"🏫 Provisioning {len(rows)} rows into {_get_base_path()}")
+    started = time.perf_counter()
+    pending = {}  # job_id -> строка
+    failed = 0
+
+    for course_id, student, project in rows:
+        if not _catalog.get_project(course_id, project):
+            print(f"✖ {course_id} / {student} / {project}: template not found in {DATA_FILE}")
+            failed += 1
+            continue
+        job_id = _submit_download(course_id, project, student, kind="update" if update else "install")
+        if isinstance(job_id, dict):
+            print(f"✖ {course_id} / {student} / {project}: {job_id['msg']}")
+            failed += 1
+            continue
+        pending[job_id] = (course_id, student, project)
+
+    downloaded = 0
+    succeeded = 0
+    while pending:
+        time.sleep(0.1)
+        for job_id in list(pending):
+            job = get_download_status(job_id)
+            if job["status"] not in _FINISHED_STATUSES:
+                continue
+            course_id, student, project = pending.pop(job_id)
+            result = job["result"] or {}
+            label = f"{course_id} / {student} / {project}"
+            if job["status"] == "success":
+                succeeded += 1
+                downloaded += job["bytes_done"] or 0
+                print(f"✔ {label}: {result.get('elapsed', 0)}s, "
+                      f"{(job['bytes_done'] or 0) / (1024 * 1024):.1f} MB downloaded "
+                      f"({result.get('mode', 'update')})")
+            else:
+                failed += 1
+                print(f"✖ {label}: {result.get('msg', job['status'])}")
+
+    wall = time.perf_counter() - started
+    print(f"\n📊 {succeeded} ok, {failed} failed in {wall:.1f}s | "
+          f"{downloaded / (1024 * 1024):.1f} MB downloaded, "
+          f"{downloaded / (1024 * 1024) / wall if wall else 0:.2f} MB/s, "
+          f"{succeeded / wall * 60 if wall else 0:.1f} installs/min | "
+          f"cache: {get_cache_stats()['hits']} hits / {get_cache_stats()['misses']} misses")
+    return 0 if failed == 0 else 1
+
+
+def _positive_int(text):
+    """Тип для argparse: целое >= 1 (иначе argparse печатает ошибку и выходит с кодом 2)."""
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {text!r}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+
+def _cli(argv):
+    parser = argparse.ArgumentParser(prog="main.py", description="DigisCool launcher (headless mode)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    provision = commands.add_parser("provision", help="install templates for a roster of students")
+    provision.add_argument("roster", help="CSV file with rows: course_id,student,project")
+    provision.add_argument("--workers", type=_positive_int, default=None,
+                           help="parallel downloads (default: max_parallel_downloads from config.json)")
+    provision.add_argument("--update", action="store_true",
+                           help="update already installed projects instead of installing")
+
+    args = parser.parse_args(argv)
+    if args.command == "provision":
+        return _provision_roster(args.roster, workers=args.workers, update=args.update)
+    return 2
+
+
 if __name__ == '__main__':
+    # С аргументами — консольный режим (например, "provision roster.csv"), без них — окно
+    if len(sys.argv) > 1:
+        sys.exit(_cli(sys.argv[1:]))
+
     eel.init('web')
-    eel.start('index.html', size=(1000, 700))
\ No newline at end of file
+    eel.spawn(_ui_pump)
+    # watchdog обходит всё дерево папок — это не должно задерживать окно
+    threading.Thread(target=_start_installed_watcher, name="installed-watcher", daemon=True).start()
+    _record_span("startup.python", time.perf_counter() - _STARTED_AT)
+    eel.start('index.html', size=(1000, 700))
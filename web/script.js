@@ -1,37 +1,48 @@
 // Глобальные переменные
 let allCourses = [];
 let currentCourse = null;
+let installedTask = null; // Текущее сканирование установленных проектов (можно отменить)
 
 // --- 1. ЗАПУСК (INITIALIZATION) ---
 window.addEventListener('load', async () => {
     console.log("🚀 App Starting...");
 
-    // 1. Проверяем систему (Старая добрая функция)
-    await checkSystem();
+    // 1. Всё для первого экрана одним вызовом: курсы, настройки, прошлый статус программ
+    const started = performance.now();
+    let state;
+    try {
+        state = await eel.get_startup_state()();
+    } catch (e) {
+        console.error("Critical Error loading startup state:", e);
+        document.body.innerHTML = `<h2 style="color:red; padding:20px;">Ошибка связи с Python backend. Проверьте консоль.</h2>`;
+        return;
+    }
+    const stateMs = performance.now() - started;
+
+    applySettings(state.settings);
+    Object.entries(state.software).forEach(([tool, data]) => updateStatusUI(tool, data, true));
+    showCourses(state.courses);
 
-    // 2. Грузим настройки (Путь установки)
-    await loadSettings();
+    // 2. Замер: через два кадра первый экран точно нарисован
+    requestAnimationFrame(() => requestAnimationFrame(() => {
+        eel.report_startup_timing({first_paint_ms: performance.now(), state_ms: stateMs});
+    }));
 
-    // 3. Загружаем курсы
-    await loadCourses();
+    // 3. Свежая проверка системы — в фоне, результаты приходят по мере готовности
+    checkSystem();
 });
 
 // --- 2. ЛОГИКА КУРСОВ (CORE LOGIC) ---
 
-async function loadCourses() {
-    try {
-        allCourses = await eel.get_courses()();
-        console.log("📚 Courses loaded:", allCourses.length);
+function showCourses(courses) {
+    allCourses = courses;
+    console.log("📚 Courses loaded:", allCourses.length);
 
-        renderSidebar(allCourses);
+    renderSidebar(allCourses);
 
-        // Авто-выбор первого курса
-        if (allCourses.length > 0) {
-            selectCourse(allCourses[0].id);
-        }
-    } catch (e) {
-        console.error("Critical Error loading courses:", e);
-        document.body.innerHTML = `<h2 style="color:red; padding:20px;">Ошибка связи с Python backend. Проверьте консоль.</h2>`;
+    // Авто-выбор первого курса
+    if (allCourses.length > 0) {
+        selectCourse(allCourses[0].id);
     }
 }
 
@@ -151,72 +162,179 @@ function selectTemplateUI(domElement) {
 }
 
 // --- 4. СЕКЦИЯ "УСТАНОВЛЕННЫЕ ПРОЕКТЫ" (INSTALLED) ---
+// Список грузится страницами (get_installed_page): сначала первая страница,
+// следующие — когда пользователь докручивает до конца списка. Следующие страницы
+// просим с тем же snapshot, чтобы установки во время прокрутки не сдвигали строки.
+
+const INSTALLED_PAGE_SIZE = 50;
+let installedList = {courseId: null, search: '', loaded: 0, total: 0, generation: 0, snapshot: null};
+let installedObserver = null;
+let installedSearchTimer = null;
+
+// Загружает страницу; null — если запрос устарел (сменили курс или поиск)
+async function fetchInstalledPage(offset) {
+    // Если пользователь быстро переключает курсы, старый запрос отменяем
+    if (installedTask) installedTask.cancel();
+    const generation = installedList.generation;
+    const task = runTask('get_installed_page', installedList.courseId, offset,
+                         INSTALLED_PAGE_SIZE, installedList.search, 'last_modified',
+                         offset ? installedList.snapshot : null);
+    installedTask = task;
+
+    try {
+        const page = await task.promise;
+        if (page.status === 'error') throw new Error(page.msg);
+        return generation === installedList.generation ? page : null;
+    } catch (e) {
+        if (e.cancelled) return null; // Уже идет более свежий запрос
+        throw e;
+    } finally {
+        if (installedTask === task) installedTask = null;
+    }
+}
 
 async function renderInstalledProjects(courseId) {
     const container = document.querySelector('.section-list');
     if (!container) return;
 
+    // Новый курс — поиск сбрасываем; тот же курс (например, сменили папку) — оставляем
+    const search = installedList.courseId === courseId ? installedList.search : '';
+    const searchInput = document.querySelector('.installed-search');
+    if (searchInput) searchInput.value = search;
+    installedList = {courseId, search, loaded: 0, total: 0, generation: installedList.generation + 1,
+                     snapshot: null};
+
     container.innerHTML = '<div style="padding:10px; color:#666;">Поиск проектов...</div>';
 
-    // ВАЖНО: Тут может быть ошибка, если main.py старый
-    // eel.get_installed_projects вернет ошибку, которую мы ловим выше
-    const projects = await eel.get_installed_projects(courseId)();
+    // ВАЖНО: Тут может быть ошибка, если main.py старый — ее ловим выше
+    const page = await fetchInstalledPage(0);
+    if (!page) return;
+    installedList.snapshot = page.snapshot;
 
     container.innerHTML = ''; // Очищаем "Loading..."
 
-    if (!projects || projects.length === 0) {
-        container.innerHTML = '<div style="padding:15px; color:#555; font-style:italic;">Установленных проектов пока нет.</div>';
+    if (page.total === 0) {
+        container.innerHTML = search
+            ? '<div style="padding:15px; color:#555; font-style:italic;">Ничего не найдено.</div>'
+            : '<div style="padding:15px; color:#555; font-style:italic;">Установленных проектов пока нет.</div>';
         return;
     }
 
-    projects.forEach(proj => {
-        // 1. Защита путей Windows (превращаем C:\Project в C:\\Project)
-        const safePath = (proj.path || "").replace(/\\/g, '\\\\');
-
-        // 2. ОПРЕДЕЛЯЕМ ТИП РЕДАКТОРА
-        // Берем настройку из текущего курса (если не указано — по умолчанию vscode)
-        const editorType = currentCourse.editor || 'vscode';
-
-        // 3. НАСТРАИВАЕМ КНОПКУ ЗАПУСКА
-        let runButtonHTML = '';
-
-        if (editorType === 'unity') {
-            // Черная кнопка для Unity
-            runButtonHTML = `
-                <button class="btn-action" 
-                        style="background-color: #222; color: #fff; border-color: #444;"
-                        onclick="openProjectInEditor('${safePath}', 'unity', this)">
-                    OPEN UNITY 🧊
-                </button>`;
-        } else {
-            // Стандартная кнопка для VS Code
-            runButtonHTML = `
-                <button class="btn-action" 
-                        onclick="openProjectInEditor('${safePath}', 'vscode', this)">
-                    OPEN CODE 🔵
-                </button>`;
+    // Метка в конце списка: когда она видна, догружаем следующую страницу
+    const more = document.createElement('div');
+    more.className = 'installed-more';
+    container.appendChild(more);
+    appendInstalledPage(page);
+
+    if (installedObserver) installedObserver.disconnect();
+    installedObserver = new IntersectionObserver(entries => {
+        if (entries.some(entry => entry.isIntersecting)) loadMoreInstalled();
+    }, {root: document.querySelector('.content-scroll-area'), rootMargin: '200px'});
+    installedObserver.observe(more);
+}
+
+function appendInstalledPage(page) {
+    const container = document.querySelector('.section-list');
+    const more = container.querySelector('.installed-more');
+
+    const fragment = document.createDocumentFragment();
+    page.items.forEach(proj => fragment.appendChild(renderProjectRow(proj)));
+    container.insertBefore(fragment, more);
+
+    installedList.loaded += page.items.length;
+    installedList.total = page.total;
+    more.textContent = installedList.loaded < page.total
+        ? `Показано ${installedList.loaded} из ${page.total}...`
+        : `Всего проектов: ${page.total}`;
+
+    // Если метка все еще на экране (список короче окна), observer сам не сработает —
+    // переподписка заново проверит видимость
+    if (installedObserver && installedList.loaded < page.total) {
+        installedObserver.unobserve(more);
+        installedObserver.observe(more);
+    }
+}
+
+async function loadMoreInstalled() {
+    if (installedTask || installedList.loaded >= installedList.total) return;
+    try {
+        const page = await fetchInstalledPage(installedList.loaded);
+        if (!page) return;
+        if (page.snapshot !== installedList.snapshot) {
+            // Снимок списка забыт на сервере — строки могли сдвинуться, грузим заново
+            renderInstalledProjects(installedList.courseId);
+            return;
         }
+        appendInstalledPage(page);
+    } catch (e) {
+        console.warn("Cannot load more projects:", e);
+    }
+}
 
-        // 4. СОБИРАЕМ HTML СТРОКИ
-        const row = document.createElement('div');
-        row.className = 'project-row';
-        row.innerHTML = `
-            <div>
-                <div class="project-name">${proj.name}</div>
-                <div style="font-size:0.75rem; color:#666;">Студент: ${proj.student}</div>
-            </div>
-            <div class="project-actions">
-                ${runButtonHTML}
-                
-                <button class="btn-action" onclick="eel.open_folder('${safePath}')">📂 FOLDER</button>
-            </div>
-        `;
-        container.appendChild(row);
-    });
+// Поиск по имени ученика или проекта (запрос уходит, когда пользователь перестал печатать)
+function onInstalledSearch(value) {
+    clearTimeout(installedSearchTimer);
+    installedSearchTimer = setTimeout(() => {
+        if (!currentCourse) return;
+        installedList.search = value.trim();
+        renderInstalledProjects(currentCourse.id);
+    }, 250);
+}
+
+function renderProjectRow(proj) {
+    // 1. Защита путей Windows (превращаем C:\Project в C:\\Project)
+    const safePath = (proj.path || "").replace(/\\/g, '\\\\');
+
+    // 2. ОПРЕДЕЛЯЕМ ТИП РЕДАКТОРА
+    // Берем настройку из текущего курса (если не указано — по умолчанию vscode)
+    const editorType = currentCourse.editor || 'vscode';
+
+    // 3. НАСТРАИВАЕМ КНОПКУ ЗАПУСКА
+    let runButtonHTML = '';
+
+    if (editorType === 'unity') {
+        // Черная кнопка для Unity
+        runButtonHTML = `
+            <button class="btn-action" 
+                    style="background-color: #222; color: #fff; border-color: #444;"
+                    onclick="openProjectInEditor('${safePath}', 'unity', this)">
+                OPEN UNITY 🧊
+            </button>`;
+    } else {
+        // Стандартная кнопка для VS Code
+        runButtonHTML = `
+            <button class="btn-action" 
+                    onclick="openProjectInEditor('${safePath}', 'vscode', this)">
+                OPEN CODE 🔵
+            </button>`;
+    }
+
+    // 4. СОБИРАЕМ HTML СТРОКИ
+    const row = document.createElement('div');
+    row.className = 'project-row';
+    row.innerHTML = `
+        <div>
+            <div class="project-name">${proj.name}</div>
+            <div style="font-size:0.75rem; color:#666;">Студент: ${proj.student}${formatSize(proj.size)}</div>
+        </div>
+        <div class="project-actions">
+            ${runButtonHTML}
+            
+            <button class="btn-action" onclick="eel.open_folder('${safePath}')">📂 FOLDER</button>
+            <button class="btn-action" title="Обновить до свежего шаблона (правки ученика сохраняются)"
+                    onclick="updateProject('${proj.name}', '${proj.student}')">⟳ UPDATE</button>
+        </div>
+    `;
+    return row;
 }
 
 // --- 5. ЛОГИКА СКАЧИВАНИЯ (DOWNLOAD) ---
 
+// Активные задачи: job_id -> {button, input, courseId, originalText}
+// Каждая загрузка живет в очереди Python со своим ID, поэтому несколько
+// загрузок одновременно не перетирают прогресс друг друга.
+const activeJobs = {};
+
 async function startDownload(projectName, btnElement) {
     // 1. Ищем поле ввода рядом с нажатой кнопкой
     const parent = btnElement.parentElement; // div.create-controls
@@ -229,64 +347,168 @@ async function startDownload(projectName, btnElement) {
         return;
     }
 
-    // 2. Блокируем кнопку
-    btnElement.disabled = true;
-    const originalText = btnElement.textContent;
-    btnElement.textContent = "⏳";
-
-    // 3. Запускаем
+    // 2. Ставим задачу в очередь
     const courseId = currentCourse.id;
-    console.log(`📥 Start Download: ${courseId} / ${studentName} / ${projectName}`);
+    console.log(`📥 Enqueue Download: ${courseId} / ${studentName} / ${projectName}`);
 
-    // Передаем index=0, так как у нас теперь нет списка карточек с индексами
-    const result = await eel.download_project(courseId, projectName, studentName, 0)();
+    const queued = await eel.enqueue_download(courseId, projectName, studentName)();
+    if (queued.status !== 'queued') {
+        alert("Ошибка: " + queued.msg);
+        return;
+    }
 
-    // 4. Обработка результата
-    if (result.status === 'success') {
-        btnElement.textContent = "✔";
-        btnElement.style.backgroundColor = "#4caf50";
+    // 3. Показываем очередь в списке задач (кнопку не блокируем — можно добавить следующего ученика)
+    input.value = "";
+    input.focus();
+    activeJobs[queued.job_id] = {courseId, projectName, studentName};
+    renderJobRow(queued.job_id);
+}
 
-        setTimeout(() => {
-            // Возвращаем как было
-            btnElement.textContent = originalText;
-            btnElement.disabled = false;
-            btnElement.style.backgroundColor = "";
-            input.value = ""; // Очищаем поле
-
-            // Обновляем список сверху
-            renderInstalledProjects(courseId);
-        }, 2000);
-    } else {
-        alert("Ошибка: " + result.msg);
-        btnElement.textContent = "❌";
-        setTimeout(() => {
-            btnElement.textContent = originalText;
-            btnElement.disabled = false;
-        }, 2000);
+function renderJobRow(jobId) {
+    const container = document.querySelector('.job-list');
+    const job = activeJobs[jobId];
+    if (!container || !job) return;
+
+    const row = document.createElement('div');
+    row.className = 'job-row';
+    row.id = `job-${jobId}`;
+    row.innerHTML = `
+        <span class="job-title">${job.studentName} — ${job.projectName}</span>
+        <span class="job-message">В очереди...</span>
+        <button class="btn-action" onclick="cancelJob('${jobId}')">✖</button>
+    `;
+    container.appendChild(row);
+    job.row = row;
+}
+
+// "45% Загрузка... 12.3 MB · 2.1 MB/s · ~6 с"
+function formatJobProgress(job) {
+    const parts = [];
+    if (job.percent !== null && job.percent !== undefined) parts.push(`${job.percent}%`);
+    parts.push(job.message);
+
+    if (job.stage === 'download' && job.bytes_done) {
+        let details = `${(job.bytes_done / (1024 * 1024)).toFixed(1)} MB`;
+        if (job.speed) details += ` · ${(job.speed / (1024 * 1024)).toFixed(1)} MB/s`;
+        if (job.eta !== null && job.eta !== undefined) details += ` · ~${Math.ceil(job.eta)} с`;
+        parts.push(details);
+    } else if (job.stage === 'extract' && job.files_total) {
+        parts.push(`${job.files_done}/${job.files_total} файлов`);
     }
+    return parts.join(' ');
 }
 
-// Эту функцию вызывает Python (eel.update_ui_progress)
-eel.expose(update_ui_progress);
-function update_ui_progress(index, percent, message) {
-    console.log(`Progress: ${percent}% ${message}`);
+// Обновление установленного проекта: пишутся только изменившиеся файлы шаблона
+async function updateProject(projectName, studentName) {
+    const courseId = currentCourse.id;
+    const queued = await eel.update_project(courseId, projectName, studentName)();
+    if (queued.status !== 'queued') {
+        alert("Ошибка: " + queued.msg);
+        return;
+    }
+    activeJobs[queued.job_id] = {courseId, projectName, studentName};
+    renderJobRow(queued.job_id);
+}
 
-    // Ищем кнопку внутри АКТИВНОГО (selected) шаблона
-    const activeBtn = document.querySelector('.template-item.selected .btn-add');
+async function cancelJob(jobId) {
+    const result = await eel.cancel_download(jobId)();
+    if (result.status === 'error') console.warn("Cancel failed:", result.msg);
+}
+
+// Эту функцию вызывает Python (eel.update_job_progress) для каждой задачи
+eel.expose(update_job_progress);
+function update_job_progress(job) {
+    const state = activeJobs[job.job_id];
+    if (!state || !state.row) return;
 
-    if (activeBtn) {
-        // Превращаем кнопку в прогресс-бар
-        activeBtn.style.minWidth = "60px";
-        activeBtn.textContent = `${percent}%`;
+    const message = state.row.querySelector('.job-message');
+    const cancelBtn = state.row.querySelector('button');
 
-        if (percent >= 100) {
-            activeBtn.textContent = "OK";
+    if (job.status === 'running' || job.status === 'queued') {
+        message.textContent = formatJobProgress(job);
+        return;
+    }
+
+    // Задача завершена
+    cancelBtn.disabled = true;
+    if (job.status === 'success' && job.kind === 'update') {
+        const r = job.result;
+        message.textContent = `✔ +${r.added.length} ~${r.updated.length}`;
+        if (r.conflicts.length) {
+            message.textContent += ` · не тронуто (правки ученика): ${r.conflicts.length}`;
+            message.title = r.conflicts.join('\n');
+        }
+        if (r.removed_upstream.length) message.textContent += ` · удалено в шаблоне: ${r.removed_upstream.length}`;
+        state.row.classList.add('job-done');
+    } else if (job.status === 'success') {
+        message.textContent = "✔ Готово";
+        state.row.classList.add('job-done');
+        if (currentCourse && currentCourse.id === state.courseId) {
+            renderInstalledProjects(state.courseId);
         }
+    } else if (job.status === 'cancelled') {
+        message.textContent = "Отменено";
+    } else {
+        message.textContent = "❌ " + ((job.result && job.result.msg) || job.message);
+        state.row.classList.add('job-failed');
     }
+
+    delete activeJobs[job.job_id];
+    setTimeout(() => state.row.remove(), job.status === 'error' ? 10000 : 3000);
 }
 
 // --- 6. ВСПОМОГАТЕЛЬНЫЕ ФУНКЦИИ (HELPERS) ---
 
+// Фоновые задачи Python: тяжелая работа идет в потоке, окно не замирает.
+// runTask возвращает {promise, cancel}; результат приходит событием on_task_done.
+const pendingTasks = {};  // task_id -> {resolve, reject}
+const finishedTasks = {}; // task_id -> событие, пришедшее раньше, чем мы начали ждать
+
+function runTask(name, ...args) {
+    const started = eel.start_task(name, args)();
+    const promise = started.then(info => new Promise((resolve, reject) => {
+        if (info.status !== 'started') {
+            reject(new Error(info.msg));
+            return;
+        }
+        pendingTasks[info.task_id] = {resolve, reject};
+        if (finishedTasks[info.task_id]) {
+            on_task_done(finishedTasks[info.task_id]);
+            delete finishedTasks[info.task_id];
+        }
+    }));
+    const cancel = async () => {
+        const info = await started;
+        if (info.task_id) await eel.cancel_task(info.task_id)();
+    };
+    return {promise, cancel};
+}
+
+// Эту функцию вызывает Python, когда задача из start_task завершилась
+eel.expose(on_task_done);
+function on_task_done(task) {
+    const pending = pendingTasks[task.task_id];
+    if (!pending) {
+        finishedTasks[task.task_id] = task;
+        return;
+    }
+    delete pendingTasks[task.task_id];
+
+    if (task.status === 'success') {
+        pending.resolve(task.result);
+    } else {
+        const error = new Error(task.msg);
+        error.cancelled = task.status === 'cancelled';
+        pending.reject(error);
+    }
+}
+
+// Размер проекта для карточки (" · 12.3 MB"), пусто если неизвестен
+function formatSize(bytes) {
+    if (bytes === undefined || bytes === null) return '';
+    return ` · ${(bytes / (1024 * 1024)).toFixed(1)} MB`;
+}
+
 function getColorForCourse(id) {
     const colors = {'minecraft': '#4caf50', 'python': '#ffeb3b', 'roblox': '#e53935', 'js': '#fbc02d'};
     for (let key in colors) {
@@ -295,20 +517,8 @@ function getColorForCourse(id) {
     return '#4f46e5';
 }
 
-// Старая логика проверки системы (работает с header)
-async function checkSystem() {
-    try {
-        const results = await eel.check_software_versions()();
-        for (const [tool, data] of Object.entries(results)) {
-            updateStatusUI(tool, data);
-        }
-    } catch (e) {
-        console.warn("System check failed:", e);
-    }
-}
-
-// Функция обновления иконок статуса
-function updateStatusUI(tool, data) {
+// Функция обновления иконок статуса (stale — результат с прошлого запуска, идет перепроверка)
+function updateStatusUI(tool, data, stale = false) {
     const el = document.getElementById(`status-${tool}`);
     if (!el) return;
 
@@ -323,6 +533,7 @@ function updateStatusUI(tool, data) {
         el.style.opacity = '1';
         el.style.color = '#fff'; // Яркий белый текст
         el.title = `OK: ${data.tooltip || data.version}`;
+        if (stale) el.title += ' (прошлая проверка, обновляется...)';
     } else {
         // Ошибка / Не найдено
         if (icon) {
@@ -334,42 +545,35 @@ function updateStatusUI(tool, data) {
     }
 }
 
-// Убедись, что checkSystem вызывает Python и передает данные сюда
+// Проверка окружения: Python запускает все проверки параллельно
+// и присылает каждый результат отдельно (update_software_status), как только он готов
 async function checkSystem() {
     console.log("Checking environment...");
     try {
-        const results = await eel.check_software_versions()();
-        console.log("Env Results:", results);
-
-        // Список ключей должен совпадать с Python report и HTML IDs
-        const tools = ['java', 'vscode', 'unity', 'visualstudio', 'mcedu'];
-
-        tools.forEach(tool => {
-            if (results[tool]) {
-                updateStatusUI(tool, results[tool]);
-            }
-        });
+        await eel.start_software_check()();
     } catch (e) {
         console.warn("System check failed:", e);
     }
 }
 
-// Старая логика настроек (работает с header)
-async function loadSettings() {
-    try {
-        const settings = await eel.get_current_settings()();
-        const label = document.getElementById('install-path-label');
-        if (label) {
-            label.innerText = settings.download_path || "Документы";
-            label.title = settings.download_path;
-        }
-    } catch (e) {
-        console.warn("Settings load failed:", e);
+// Эту функцию вызывает Python для каждой проверки
+eel.expose(update_software_status);
+function update_software_status(data) {
+    // Ключ data.tool совпадает с HTML ID (status-java, status-vscode, ...)
+    updateStatusUI(data.tool, data);
+}
+
+// Путь установки в header
+function applySettings(settings) {
+    const label = document.getElementById('install-path-label');
+    if (label) {
+        label.innerText = settings.download_path || "Документы";
+        label.title = settings.download_path;
     }
 }
 
 async function changeFolder() {
-    const newPath = await eel.choose_folder()();
+    const newPath = await runTask('choose_folder').promise;
     if (newPath) {
         const label = document.getElementById('install-path-label');
         if (label) label.innerText = newPath;
@@ -406,4 +610,78 @@ async function openProjectInEditor(path, editorType, btnElement) {
         btnElement.style.backgroundColor = originalColor;
         btnElement.disabled = false;
     }, 1500);
-}
\ No newline at end of file
+}
+// --- 7. ДИАГНОСТИКА (DIAGNOSTICS) ---
+// Панель показывает замеры этапов из Python (get_metrics): p50/p95, гистограмму
+// и скорость. connect/transfer — это сеть, folder_create/extract/provision — диск.
+
+let diagnosticsTimer = null;
+
+function toggleDiagnostics() {
+    const body = document.querySelector('.diagnostics-body');
+    const icon = document.querySelector('.diagnostics-section .toggle-icon');
+    if (!body) return;
+
+    const opening = body.style.display === 'none';
+    body.style.display = opening ? 'block' : 'none';
+    if (icon) icon.textContent = opening ? '▲' : '▼';
+
+    clearInterval(diagnosticsTimer);
+    diagnosticsTimer = null;
+    if (opening) {
+        loadDiagnostics();
+        diagnosticsTimer = setInterval(loadDiagnostics, 2000); // Обновляем, пока панель открыта
+    }
+}
+
+async function loadDiagnostics() {
+    try {
+        renderDiagnostics(await eel.get_metrics()());
+    } catch (e) {
+        console.warn("Metrics load failed:", e);
+    }
+}
+
+function renderDiagnostics(metrics) {
+    const body = document.querySelector('.diagnostics-body');
+    if (!body) return;
+
+    const names = Object.keys(metrics.spans);
+    if (names.length === 0) {
+        body.innerHTML = '<div class="diagnostics-footer">Пока нет замеров — установите проект или проверьте систему.</div>';
+        return;
+    }
+
+    const ms = (seconds) => `${Math.round(seconds * 1000)} ms`;
+    const rows = names.map(name => {
+        const span = metrics.spans[name];
+        const peak = Math.max(...span.histogram, 1);
+        const bars = span.histogram.map((count, i) => {
+            const limit = i < metrics.buckets.length ? `≤ ${metrics.buckets[i]} s` : `> ${metrics.buckets[i - 1]} s`;
+            return `<span style="height:${Math.round(count / peak * 100)}%" title="${limit}: ${count}"></span>`;
+        }).join('');
+        return `
+            <tr>
+                <td>${name}</td>
+                <td>${span.count}${span.errors ? ` (${span.errors} ✖)` : ''}</td>
+                <td>${ms(span.p50)}</td>
+                <td>${ms(span.p95)}</td>
+                <td>${ms(span.max)}</td>
+                <td>${span.mb_per_sec_p50 !== null ? span.mb_per_sec_p50.toFixed(1) : ''}</td>
+                <td><div class="histogram">${bars}</div></td>
+            </tr>`;
+    }).join('');
+
+    const hosts = Object.entries(metrics.http)
+        .map(([host, stats]) => `${host}: ${stats.p50_ms} / ${stats.p95_ms} ms`).join(', ');
+
+    body.innerHTML = `
+        <table class="diagnostics-table">
+            <tr><th>Этап</th><th>Замеров</th><th>p50</th><th>p95</th><th>max</th><th>MB/s</th><th>Гистограмма</th></tr>
+            ${rows}
+        </table>
+        <div class="diagnostics-footer">
+            Кэш: ${metrics.cache.hits} попаданий / ${metrics.cache.misses} промахов${formatSize(metrics.cache.size_bytes)}
+            ${hosts ? `<br>HTTP p50 / p95 до заголовков — ${hosts}` : ''}
+        </div>`;
+}